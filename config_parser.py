@@ -21,7 +21,9 @@ DEFAULT_CONFIG = {
     'svg': {
         'width': 800,
         'height': 600,
-        'padding': 0.05
+        'padding': 0.05,
+        'background_pattern': True,
+        'coordinate_precision': 1
     }
 }
 
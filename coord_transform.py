@@ -9,10 +9,57 @@ This module handles the transformation of geographic coordinates to SVG coordina
 
 import math
 import logging
+from functools import lru_cache
+import numpy as np
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=16)
+def projection_params(bbox, svg_width, svg_height, padding=0.05):
+    """
+    Compute the scale and offsets mapping a bounding box onto the SVG canvas.
+    
+    The result only depends on the map setup, so it is computed once per map and
+    shared by every coordinate transform.
+    
+    Args:
+        bbox (tuple): (min_lon, min_lat, max_lon, max_lat)
+        svg_width (int): Width of SVG canvas
+        svg_height (int): Height of SVG canvas
+        padding (float, optional): Padding percentage for the SVG canvas. Defaults to 0.05 (5%).
+        
+    Returns:
+        tuple: (scale, x_offset, y_offset)
+        
+    Raises:
+        ValueError: If bounding box dimensions are invalid
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    
+    # Calculate width/height ratio to maintain proportions
+    lon_range = max_lon - min_lon
+    lat_range = max_lat - min_lat
+    
+    if lon_range <= 0 or lat_range <= 0:
+        raise ValueError("Invalid bounding box dimensions: zero or negative range")
+    
+    # Add padding to prevent features from touching the edges
+    effective_width = svg_width * (1 - 2 * padding)
+    effective_height = svg_height * (1 - 2 * padding)
+    
+    # Calculate scales that would preserve the aspect ratio in both directions
+    scale_x = effective_width / lon_range
+    scale_y = effective_height / lat_range
+    
+    # Use the smaller scale to ensure the map fits in both dimensions
+    scale = min(scale_x, scale_y)
+    
+    # Calculate centered offsets
+    x_offset = (svg_width - (lon_range * scale)) / 2
+    y_offset = (svg_height - (lat_range * scale)) / 2
+    return scale, x_offset, y_offset
+
 def lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height, padding=0.05):
     """
     Convert geographic coordinates to SVG coordinates with aspect ratio handling.
@@ -44,27 +91,7 @@ def lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height, padding=0.05):
         lat = max(min_lat - margin, min(lat, max_lat + margin))
         lon = max(min_lon - margin, min(lon, max_lon + margin))
         
-        # Calculate width/height ratio to maintain proportions
-        lon_range = max_lon - min_lon
-        lat_range = max_lat - min_lat
-        
-        if lon_range <= 0 or lat_range <= 0:
-            raise ValueError("Invalid bounding box dimensions: zero or negative range")
-        
-        # Add padding to prevent features from touching the edges
-        effective_width = svg_width * (1 - 2 * padding)
-        effective_height = svg_height * (1 - 2 * padding)
-        
-        # Calculate scales that would preserve the aspect ratio in both directions
-        scale_x = effective_width / lon_range
-        scale_y = effective_height / lat_range
-        
-        # Use the smaller scale to ensure the map fits in both dimensions
-        scale = min(scale_x, scale_y)
-        
-        # Calculate centered offsets
-        x_offset = (svg_width - (lon_range * scale)) / 2
-        y_offset = (svg_height - (lat_range * scale)) / 2
+        scale, x_offset, y_offset = projection_params(tuple(bbox), svg_width, svg_height, padding)
         
         # Transform coordinates
         x = x_offset + (lon - min_lon) * scale
@@ -78,6 +105,42 @@ def lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height, padding=0.05):
         logger.error(f"Coordinate transformation error: {e}")
         return (svg_width/2, svg_height/2)  # Return center of canvas as fallback
 
+def lat_lon_to_xy_batch(lats, lons, bbox, svg_width, svg_height, padding=0.05):
+    """
+    Convert arrays of geographic coordinates to SVG coordinates in one pass.
+    
+    Same mapping as lat_lon_to_xy, applied to whole arrays at once.
+    
+    Args:
+        lats (array-like): Latitudes
+        lons (array-like): Longitudes
+        bbox (tuple): (min_lon, min_lat, max_lon, max_lat)
+        svg_width (int): Width of SVG canvas
+        svg_height (int): Height of SVG canvas
+        padding (float, optional): Padding percentage for the SVG canvas. Defaults to 0.05 (5%).
+        
+    Returns:
+        numpy.ndarray: (k, 2) array of SVG (x, y) coordinates
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    min_lon, min_lat, max_lon, max_lat = bbox
+    try:
+        scale, x_offset, y_offset = projection_params(tuple(bbox), svg_width, svg_height, padding)
+    except ValueError as e:
+        logger.error(f"Coordinate transformation error: {e}")
+        return np.tile([svg_width/2, svg_height/2], (len(lats), 1)).astype(np.float64)
+    
+    # Clamp coordinates to bbox with a small margin
+    margin = 0.001
+    lats = np.clip(lats, min_lat - margin, max_lat + margin)
+    lons = np.clip(lons, min_lon - margin, max_lon + margin)
+    
+    xy = np.empty((len(lats), 2), dtype=np.float64)
+    xy[:, 0] = x_offset + (lons - min_lon) * scale
+    xy[:, 1] = y_offset + (max_lat - lats) * scale  # Invert Y axis
+    return xy
+
 def transform_coordinates(coordinates, bbox, svg_width, svg_height, padding=0.05):
     """
     Transform a list of geographic coordinates to SVG coordinates.
@@ -92,8 +155,11 @@ def transform_coordinates(coordinates, bbox, svg_width, svg_height, padding=0.05
     Returns:
         list: List of (x, y) SVG coordinates
     """
-    return [lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height, padding) 
-            for lon, lat in coordinates]
+    if not coordinates:
+        return []
+    coords = np.asarray(coordinates, dtype=np.float64)
+    xy = lat_lon_to_xy_batch(coords[:, 1], coords[:, 0], bbox, svg_width, svg_height, padding)
+    return [tuple(point) for point in xy.tolist()]
 
 def transform_feature(feature, bbox, svg_width, svg_height, padding=0.05):
     """
@@ -122,6 +188,10 @@ def transform_feature(feature, bbox, svg_width, svg_height, padding=0.05):
         svg_coords = transform_coordinates(feature['coordinates'], bbox, svg_width, svg_height, padding)
         return {**feature, 'svg_coordinates': svg_coords}
 
+# Corner order of calculate_label_corners, as signs of the half width and half height
+_CORNER_SIGNS_W = np.array([-1.0, 1.0, 1.0, -1.0])
+_CORNER_SIGNS_H = np.array([-1.0, -1.0, 1.0, 1.0])
+
 def calculate_label_corners(x, y, width, height, angle, buffer=5):
     """
     Calculate label corners with buffer.
@@ -135,43 +205,63 @@ def calculate_label_corners(x, y, width, height, angle, buffer=5):
         buffer (float, optional): Buffer around the label. Defaults to 5.
         
     Returns:
-        list: Four corner points of the buffered label area
+        numpy.ndarray: (4, 2) corner points of the buffered label area
     """
     cos_a = math.cos(math.radians(angle))
     sin_a = math.sin(math.radians(angle))
     w2 = (width/2 + buffer)
     h2 = (height/2 + buffer)
-    return [
+    return np.array([
         (x - w2*cos_a + h2*sin_a, y - w2*sin_a - h2*cos_a),
         (x + w2*cos_a + h2*sin_a, y + w2*sin_a - h2*cos_a),
         (x + w2*cos_a - h2*sin_a, y + w2*sin_a + h2*cos_a),
         (x - w2*cos_a - h2*sin_a, y - w2*sin_a + h2*cos_a)
-    ]
+    ])
 
-def project_point_to_line(point, line_start, line_end):
+def label_corner_offsets(width, height, angle, buffer=5):
     """
-    Project a point onto a line segment, returning the projected point.
+    Calculate label corners relative to the label center.
+    
+    Adding a label position gives the corners of calculate_label_corners, so the
+    rotation is computed once per label rather than once per candidate position.
+    
+    Args:
+        width (float): Width of label
+        height (float): Height of label
+        angle (float): Rotation angle in degrees
+        buffer (float or list, optional): Buffer around the label, or a list of buffers. Defaults to 5.
+        
+    Returns:
+        numpy.ndarray: (4, 2) corner offsets, or (B, 4, 2) for a list of B buffers
+    """
+    cos_a = math.cos(math.radians(angle))
+    sin_a = math.sin(math.radians(angle))
+    buffer = np.asarray(buffer, dtype=np.float64)[..., None]
+    w2 = (width/2 + buffer) * _CORNER_SIGNS_W
+    h2 = (height/2 + buffer) * _CORNER_SIGNS_H
+    return np.stack([w2*cos_a - h2*sin_a, w2*sin_a + h2*cos_a], axis=-1)
+
+def project_point_to_segments(point, starts, ends):
+    """
+    Project a point onto an array of segments and return the closest projection.
     
     Args:
         point (tuple): (x, y) point to project
-        line_start (tuple): (x, y) starting point of line
-        line_end (tuple): (x, y) ending point of line
+        starts (numpy.ndarray): (m, 2) segment start points
+        ends (numpy.ndarray): (m, 2) segment end points
         
     Returns:
-        tuple: (x, y) projected point on the line
-    """
-    px, py = point
-    ax, ay = line_start
-    bx, by = line_end
-    apx = px - ax
-    apy = py - ay
-    abx = bx - ax
-    aby = by - ay
-    ab2 = abx * abx + aby * aby
-    if ab2 == 0:
-        return line_start
-    t = max(0, min(1, (apx * abx + apy * aby) / ab2))
-    return (ax + t * abx, ay + t * aby)
+        tuple: (squared distance, index of the closest segment, (x, y) projected point)
+    """
+    ab = ends - starts
+    ap = np.asarray(point, dtype=np.float64) - starts
+    ab2 = ab[:, 0] * ab[:, 0] + ab[:, 1] * ab[:, 1]
+    # Degenerate segments project onto their start point
+    t = np.divide(ap[:, 0] * ab[:, 0] + ap[:, 1] * ab[:, 1], ab2, out=np.zeros_like(ab2), where=ab2 != 0)
+    proj = starts + np.clip(t, 0, 1)[:, None] * ab
+    d2 = ((point[0] - proj[:, 0])**2 + (point[1] - proj[:, 1])**2)
+    i = int(np.argmin(d2))
+    return float(d2[i]), i, (float(proj[i, 0]), float(proj[i, 1]))
 
 def calculate_feature_center(coordinates):
     """
@@ -187,14 +277,16 @@ def calculate_feature_center(coordinates):
         return (0, 0)
     
     # For simple calculation, average all points
-    x_sum = sum(p[0] for p in coordinates)
-    y_sum = sum(p[1] for p in coordinates)
-    return (x_sum / len(coordinates), y_sum / len(coordinates))
+    center_x, center_y = np.asarray(coordinates, dtype=np.float64)[:, :2].mean(axis=0).tolist()
+    return (center_x, center_y)
 
+@lru_cache(maxsize=1024)
 def kml_color_to_svg(kml_color):
     """
     Convert KML color format (aabbggrr) to SVG format (#rrggbb).
     
+    KML files reuse a few colors across many features, so conversions are cached.
+    
     Args:
         kml_color (str): KML color string
         
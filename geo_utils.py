@@ -10,6 +10,9 @@ calculation and boundary tests.
 
 from shapely.geometry import Point, Polygon, LineString, MultiPoint
 from shapely.ops import unary_union
+from shapely.prepared import prep, PreparedGeometry
+import shapely
+import numpy as np
 import logging
 
 # Set up logging
@@ -101,13 +104,47 @@ def is_point_in_boundary(point, boundary_coords, buffer=0):
         logger.warning(f"Boundary test failed for point {point}: {e}")
         return True  # If test fails, include the feature rather than exclude it
 
+def coordinate_list(geometry):
+    """
+    Get the coordinates of a LineString or LinearRing as a list of tuples.
+    
+    Same result as list(geometry.coords), but read from a single numpy array instead
+    of one Python-level coordinate at a time.
+    
+    Args:
+        geometry (LineString or LinearRing): Shapely geometry
+        
+    Returns:
+        list: List of coordinate tuples
+    """
+    return [tuple(c) for c in shapely.get_coordinates(geometry, include_z=geometry.has_z).tolist()]
+
+def prepare_boundary(boundary_coords, buffer=0.0002):
+    """
+    Build a buffered, prepared boundary polygon for repeated boundary tests.
+    
+    The prepared geometry can be passed to is_line_in_boundary and
+    lines_in_boundary in place of the boundary coordinates.
+    
+    Args:
+        boundary_coords (list): List of (longitude, latitude) coordinates
+        buffer (float, optional): Buffer distance to add around boundary. Defaults to 0.0002.
+        
+    Returns:
+        PreparedGeometry: Prepared buffered boundary, or None if no boundary is given
+    """
+    if not boundary_coords:
+        return None
+    return prep(Polygon(boundary_coords).buffer(buffer))
+
 def is_line_in_boundary(points, boundary_coords, buffer=0.0002):
     """
     Check if a line intersects or is contained within the boundary polygon.
     
     Args:
         points (list): List of (longitude, latitude) coordinates representing a line
-        boundary_coords (list): List of (longitude, latitude) coordinates
+        boundary_coords (list or PreparedGeometry): List of (longitude, latitude) coordinates,
+            or a boundary already built with prepare_boundary (its buffer is used as is)
         buffer (float, optional): Buffer distance to add around boundary. Defaults to 0.0002.
         
     Returns:
@@ -116,29 +153,72 @@ def is_line_in_boundary(points, boundary_coords, buffer=0.0002):
     if not boundary_coords:
         return True
     try:
-        polygon = Polygon(boundary_coords)
+        if isinstance(boundary_coords, PreparedGeometry):
+            buffered_polygon = boundary_coords
+            polygon = boundary_coords.context
+        else:
+            # Add buffer to boundary
+            buffered_polygon = polygon = Polygon(boundary_coords).buffer(buffer)
+        if len(points) > 1:
+            # Lines whose bounding box misses the boundary's cannot intersect it
+            min_x, min_y, max_x, max_y = polygon.bounds
+            coords = np.asarray(points, dtype=np.float64)
+            low, high = coords.min(axis=0), coords.max(axis=0)
+            if high[0] < min_x or low[0] > max_x or high[1] < min_y or low[1] > max_y:
+                return False
         shape = Polygon(points) if len(points) > 2 else LineString(points)
         
-        # Add buffer to boundary
-        buffered_polygon = polygon.buffer(buffer)
-        
         # Check for intersection with buffered boundary
-        intersects = buffered_polygon.intersects(shape)
-        
-        # For debugging certain features
-        if logger.isEnabledFor(logging.DEBUG) and any(2.179 <= p[0] <= 2.181 and 48.944 <= p[1] <= 48.946 for p in points):
-            logger.debug(f"Boundary test for feature near allotment area:")
-            logger.debug(f"- Points: {points[:2]}...")
-            logger.debug(f"- Intersects with boundary: {intersects}")
-            logger.debug(f"- Shape type: {'Polygon' if len(points) > 2 else 'LineString'}")
-            logger.debug(f"- Area overlaps: {buffered_polygon.intersection(shape).area > 0}")
-        
-        return intersects
+        return buffered_polygon.intersects(shape)
         
     except Exception as e:
         logger.warning(f"Boundary test failed: {e}")
         return True  # If test fails, include the feature rather than exclude it
 
+def lines_in_boundary(lines, boundary_coords, buffer=0.0002):
+    """
+    Test many lines against the boundary polygon at once.
+
+    Same result as is_line_in_boundary on each line, but the shapes are built
+    and tested in single vectorized calls. Lines of fewer than two points
+    cannot be tested and count as inside, as with is_line_in_boundary.
+
+    Args:
+        lines (list): Arrays of (longitude, latitude) coordinates, one per line
+        boundary_coords (list or PreparedGeometry): List of (longitude, latitude) coordinates,
+            or a boundary already built with prepare_boundary (its buffer is used as is)
+        buffer (float, optional): Buffer distance to add around boundary. Defaults to 0.0002.
+
+    Returns:
+        numpy.ndarray: Boolean mask, True for lines that intersect the boundary
+    """
+    inside = np.ones(len(lines), dtype=bool)
+    if not boundary_coords or not lines:
+        return inside
+    if isinstance(boundary_coords, PreparedGeometry):
+        polygon = boundary_coords.context
+    else:
+        polygon = Polygon(boundary_coords).buffer(buffer)
+        shapely.prepare(polygon)
+    counts = np.fromiter(map(len, lines), dtype=np.intp, count=len(lines))
+    try:
+        # Two-point lines are tested as lines, longer ones as polygons
+        for selected, build in ((np.flatnonzero(counts == 2), shapely.linestrings),
+                                (np.flatnonzero(counts > 2), _polygons)):
+            if selected.size:
+                coords = np.concatenate([lines[i] for i in selected])
+                indices = np.repeat(np.arange(selected.size), counts[selected])
+                inside[selected] = shapely.intersects(polygon, build(coords, indices=indices))
+        return inside
+    except Exception as e:
+        # A shape that cannot be built fails the whole batch; test the lines one by one
+        logger.debug(f"Vectorized boundary test failed, testing lines one by one: {e}")
+        return np.array([is_line_in_boundary(points, boundary_coords, buffer) for points in lines], dtype=bool)
+
+def _polygons(coords, indices):
+    """Polygons from rings given as consecutive coordinates, closed as needed"""
+    return shapely.polygons(shapely.linearrings(coords, indices=indices))
+
 def calculate_feature_area(coords):
     """
     Calculate the area of a feature in square degrees.
@@ -230,7 +310,7 @@ def simplify_boundary(boundary_coords, tolerance=0.0001):
         simplified = boundary.simplify(tolerance, preserve_topology=True)
         
         # Extract coordinates from the simplified polygon
-        coords = list(simplified.exterior.coords)
+        coords = coordinate_list(simplified.exterior)
         
         # Remove the last point if it's the same as the first (closed polygon)
         if coords[0] == coords[-1]:
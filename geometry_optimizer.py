@@ -16,6 +16,8 @@ from shapely.geometry import Polygon, LineString, Point, MultiPolygon
 # so we don't need to import it separately
 from shapely.ops import unary_union
 
+from geo_utils import coordinate_list
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -50,11 +52,11 @@ def simplify_polygon(polygon, tolerance=0.00001, preserve_topology=True):
         
         # Get coordinates
         if isinstance(simplified, Polygon):
-            return list(simplified.exterior.coords)
+            return coordinate_list(simplified.exterior)
         elif isinstance(simplified, MultiPolygon):
             # Return the largest polygon
             largest = max(simplified.geoms, key=lambda x: x.area)
-            return list(largest.exterior.coords)
+            return coordinate_list(largest.exterior)
         else:
             logger.warning(f"Unexpected type after simplification: {type(simplified)}")
             return polygon
@@ -84,7 +86,7 @@ def simplify_linestring(linestring, tolerance=0.00001, preserve_topology=True):
         simplified = shapely_line.simplify(tolerance=tolerance, preserve_topology=preserve_topology)
         
         # Get coordinates
-        return list(simplified.coords)
+        return coordinate_list(simplified)
     except Exception as e:
         logger.error(f"Error simplifying linestring: {e}")
         return linestring
@@ -12,6 +12,8 @@ from pykml import parser
 import logging
 import os
 
+from geo_utils import coordinate_list
+
 try:
     from tqdm import tqdm
     TQDM_AVAILABLE = True
@@ -130,7 +132,7 @@ def parse_kml(kml_file, optimize=False, max_features=None, simplify_tolerance=0.
                                 poly = ShapelyPolygon(coords)
                                 simplified = poly.simplify(tolerance=simplify_tolerance)
                                 original_count = len(coords)
-                                coords = list(simplified.exterior.coords)
+                                coords = coordinate_list(simplified.exterior)
                                 logger.info(f"Simplified complex polygon {name} from {original_count} to {len(coords)} vertices")
                             except Exception as e:
                                 logger.warning(f"Failed to simplify complex polygon {name}: {e}")
@@ -187,7 +189,7 @@ def parse_kml(kml_file, optimize=False, max_features=None, simplify_tolerance=0.
                                 line = ShapelyLineString(coords)
                                 simplified = line.simplify(tolerance=simplify_tolerance)
                                 original_count = len(coords)
-                                coords = list(simplified.coords)
+                                coords = coordinate_list(simplified)
                                 logger.info(f"Simplified complex LineString {name} from {original_count} to {len(coords)} vertices")
                             except Exception as e:
                                 logger.warning(f"Failed to simplify complex LineString {name}: {e}")
@@ -273,7 +275,7 @@ def parse_kml(kml_file, optimize=False, max_features=None, simplify_tolerance=0.
                                     poly = ShapelyPolygon(poly_coords)
                                     simplified = poly.simplify(tolerance=simplify_tolerance)
                                     original_count = len(poly_coords)
-                                    poly_coords = list(simplified.exterior.coords)
+                                    poly_coords = coordinate_list(simplified.exterior)
                                     logger.info(f"Simplified complex polygon in MultiGeometry from {original_count} to {len(poly_coords)} vertices")
                                 except Exception:
                                     pass
@@ -308,7 +310,7 @@ def parse_kml(kml_file, optimize=False, max_features=None, simplify_tolerance=0.
                                     line = ShapelyLineString(line_coords)
                                     simplified = line.simplify(tolerance=simplify_tolerance)
                                     original_count = len(line_coords)
-                                    line_coords = list(simplified.coords)
+                                    line_coords = coordinate_list(simplified)
                                     logger.info(f"Simplified complex LineString in MultiGeometry from {original_count} to {len(line_coords)} vertices")
                                 except Exception:
                                     pass
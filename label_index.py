@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Label Index Module
+
+This module keeps track of the areas occupied by placed labels for collision tests.
+Label areas are rectangles (possibly rotated) stored as (4, 2) corner arrays.
+"""
+
+import numpy as np
+
+def boxes_overlap(boxes, bounds):
+    """
+    Test axis-aligned boxes against an array of bounding boxes.
+
+    Args:
+        boxes (array-like): A single (minx, miny, maxx, maxy) box or a (K, 4) array of boxes
+        bounds (numpy.ndarray): (N, 4) array of (minx, miny, maxx, maxy) boxes
+
+    Returns:
+        numpy.ndarray: Boolean mask of shape (N,) for a single box, or (K, N)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)
+    return ~((boxes[..., 2:3] < bounds[:, 0]) | (boxes[..., 0:1] > bounds[:, 2]) |
+             (boxes[..., 3:4] < bounds[:, 1]) | (boxes[..., 1:2] > bounds[:, 3]))
+
+def box_corners(bounds):
+    """
+    Corner arrays of axis-aligned boxes.
+
+    Args:
+        bounds (numpy.ndarray): (minx, miny, maxx, maxy) box or (N, 4) array of boxes
+
+    Returns:
+        numpy.ndarray: (4, 2) or (N, 4, 2) array of corners
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    min_x, min_y, max_x, max_y = (bounds[..., i] for i in range(4))
+    return np.stack([np.stack([min_x, min_y], axis=-1), np.stack([max_x, min_y], axis=-1),
+                     np.stack([max_x, max_y], axis=-1), np.stack([min_x, max_y], axis=-1)], axis=-2)
+
+def rectangles_intersect(corners, others):
+    """
+    Separating axis test of one rectangle against an array of rectangles.
+
+    Touching rectangles count as intersecting.
+
+    Args:
+        corners (array-like): (4, 2) corners of the rectangle
+        others (numpy.ndarray): (M, 4, 2) corners of the rectangles to test
+
+    Returns:
+        numpy.ndarray: Boolean mask of shape (M,)
+    """
+    corners = np.asarray(corners, dtype=np.float64)
+    # Two edge normals per rectangle are enough; opposite edges are parallel
+    edges = corners[1:3] - corners[0:2]
+    other_edges = others[:, 1:3] - others[:, 0:2]
+    axes = np.concatenate([np.broadcast_to(edges, other_edges.shape), other_edges], axis=1)
+    proj = np.einsum('mkd,pd->mkp', axes, corners)
+    other_proj = np.einsum('mkd,mpd->mkp', axes, others)
+    separated = ((proj.max(axis=2) < other_proj.min(axis=2)) |
+                 (other_proj.max(axis=2) < proj.min(axis=2)))
+    return ~separated.any(axis=1)
+
+def _signed_area(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return 0.5 * sum(xs[i] * ys[i - len(points) + 1] - xs[i - len(points) + 1] * ys[i]
+                     for i in range(len(points)))
+
+def intersection_area(subject, clip):
+    """
+    Area of the intersection of two convex polygons (Sutherland-Hodgman clipping).
+
+    Args:
+        subject (array-like): Corners of the first polygon
+        clip (array-like): Corners of the second polygon
+
+    Returns:
+        float: Intersection area, 0 if the polygons do not overlap
+    """
+    clip = [tuple(p) for p in np.asarray(clip, dtype=np.float64).tolist()]
+    output = [tuple(p) for p in np.asarray(subject, dtype=np.float64).tolist()]
+    orientation = 1 if _signed_area(clip) >= 0 else -1
+    for i in range(len(clip)):
+        (ax, ay), (bx, by) = clip[i - 1], clip[i]
+        def side(p):
+            return orientation * ((bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax))
+        points, output = output, []
+        for j in range(len(points)):
+            current, previous = points[j], points[j - 1]
+            current_side, previous_side = side(current), side(previous)
+            if current_side >= 0:
+                if previous_side < 0:
+                    t = previous_side / (previous_side - current_side)
+                    output.append((previous[0] + t * (current[0] - previous[0]),
+                                   previous[1] + t * (current[1] - previous[1])))
+                output.append(current)
+            elif previous_side >= 0:
+                t = previous_side / (previous_side - current_side)
+                output.append((previous[0] + t * (current[0] - previous[0]),
+                               previous[1] + t * (current[1] - previous[1])))
+        if len(output) < 3:
+            return 0.0
+    return abs(_signed_area(output))
+
+def estimated_text_bounds(bounds):
+    """
+    Estimate the text area of placed labels from their bounding boxes.
+    
+    The text is taken to fill 80% of the label area around its center, as for
+    a label placed with the default buffer.
+    
+    Args:
+        bounds (numpy.ndarray): (minx, miny, maxx, maxy) box or (N, 4) array of boxes
+        
+    Returns:
+        numpy.ndarray: Estimated text boxes with the same shape as bounds
+    """
+    centers = (bounds[..., :2] + bounds[..., 2:]) / 2
+    half_sizes = (bounds[..., 2:] - bounds[..., :2]) * 0.4
+    return np.concatenate([centers - half_sizes, centers + half_sizes], axis=-1)
+
+class LabelIndex:
+    """
+    Placed label areas as corner arrays, with their bounding boxes kept in a numpy array.
+
+    Labels are also hashed into a uniform screen-space grid, so a query only
+    looks at labels in the cells it covers. Collision tests run against the
+    bounding boxes first; the exact rectangle tests are only needed for the
+    few labels whose boxes overlap. The estimated text box of each label
+    (estimated_text_bounds) is stored alongside, as bounds and as corners.
+    """
+
+    def __init__(self, capacity=64, cell_size=128):
+        self._bounds = np.empty((capacity, 4), dtype=np.float64)
+        self._corners = np.empty((capacity, 4, 2), dtype=np.float64)
+        self._text_bounds = np.empty((capacity, 4), dtype=np.float64)
+        self._text_corners = np.empty((capacity, 4, 2), dtype=np.float64)
+        self._count = 0
+        self._cell_size = cell_size
+        self._cells = {}
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.corners)
+
+    def __getitem__(self, index):
+        return self.corners[index]
+
+    @property
+    def bounds(self):
+        """numpy.ndarray: (N, 4) array of label bounding boxes"""
+        return self._bounds[:self._count]
+
+    @property
+    def corners(self):
+        """numpy.ndarray: (N, 4, 2) array of label corners"""
+        return self._corners[:self._count]
+
+    @property
+    def text_bounds(self):
+        """numpy.ndarray: (N, 4) array of estimated text boxes"""
+        return self._text_bounds[:self._count]
+
+    @property
+    def text_corners(self):
+        """numpy.ndarray: (N, 4, 2) corners of the estimated text boxes"""
+        return self._text_corners[:self._count]
+
+    def _cell_range(self, bounds):
+        min_x, min_y, max_x, max_y = (int(v // self._cell_size) for v in bounds)
+        return ((cx, cy) for cx in range(min_x, max_x + 1) for cy in range(min_y, max_y + 1))
+
+    def add(self, corners):
+        """
+        Record a placed label area.
+
+        Args:
+            corners (list): Corner points of the label area
+
+        Returns:
+            numpy.ndarray: The stored (4, 2) corner array
+        """
+        count = self._count
+        if count == len(self._bounds):
+            self._bounds = np.concatenate([self._bounds, np.empty_like(self._bounds)])
+            self._corners = np.concatenate([self._corners, np.empty_like(self._corners)])
+            self._text_bounds = np.concatenate([self._text_bounds, np.empty_like(self._text_bounds)])
+            self._text_corners = np.concatenate([self._text_corners, np.empty_like(self._text_corners)])
+        self._corners[count] = corners
+        self._bounds[count, :2] = self._corners[count].min(axis=0)
+        self._bounds[count, 2:] = self._corners[count].max(axis=0)
+        self._text_bounds[count] = estimated_text_bounds(self._bounds[count])
+        self._text_corners[count] = box_corners(self._text_bounds[count])
+        self._count += 1
+        for cell in self._cell_range(self._bounds[count]):
+            self._cells.setdefault(cell, []).append(count)
+        return self._corners[count]
+
+    def query(self, bounds):
+        """
+        Find stored labels whose bounding boxes overlap a box.
+
+        Args:
+            bounds (array-like): (minx, miny, maxx, maxy) box to test
+
+        Returns:
+            numpy.ndarray: Sorted indices of the overlapping labels
+        """
+        found = [index for cell in self._cell_range(bounds) for index in self._cells.get(cell, ())]
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.unique(found)
+        return candidates[boxes_overlap(bounds, self._bounds[candidates])]
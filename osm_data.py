@@ -9,6 +9,8 @@ This module handles fetching and caching OpenStreetMap data.
 
 import os
 import json
+import hashlib
+import tempfile
 import requests
 from config_parser import load_config
 
@@ -31,7 +33,9 @@ def get_cache_key(bbox):
 
 def load_osm_cache():
     """
-    Load cached OSM data from file.
+    Load the shared cache file written by earlier versions.
+    
+    Only used to split that file into per-area files; see load_cached_osm_data.
     
     Returns:
         dict: Dictionary of cached OSM data
@@ -48,20 +52,78 @@ def load_osm_cache():
 
 def save_osm_cache(cache):
     """
-    Save OSM data to cache file.
+    Save OSM data to the cache, one file per area.
     
     Args:
-        cache (dict): Dictionary of OSM data to cache
+        cache (dict): Dictionary of OSM data to cache, keyed by get_cache_key
     """
+    for cache_key, osm_text in cache.items():
+        save_cached_osm_data(cache_key, osm_text)
+
+# Whether the shared cache file of earlier versions was already split up
+_legacy_cache_migrated = False
+
+def _cache_entry_path(cache_key):
+    """Path of the cache file holding the OSM data of one area"""
     cache_dir = OSM_CONFIG.get('cache_dir', 'osm-cache')
-    cache_file = OSM_CONFIG.get('cache_file', 'osmdata.json')
+    name = hashlib.sha1(cache_key.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"{name}.osm")
+
+def _migrate_osm_cache():
+    """Move the areas of the shared cache file into their own files, once per process"""
+    global _legacy_cache_migrated
+    if _legacy_cache_migrated:
+        return
+    _legacy_cache_migrated = True
+    for cache_key, osm_text in load_osm_cache().items():
+        if not os.path.exists(_cache_entry_path(cache_key)):
+            save_cached_osm_data(cache_key, osm_text)
+
+def load_cached_osm_data(cache_key):
+    """
+    Load the cached OSM data of one area.
     
-    # Ensure the cache directory exists
-    os.makedirs(cache_dir, exist_ok=True)
+    Each area is cached in its own file, so a lookup reads only that area's
+    data. The shared cache file of earlier versions is split into such files
+    on the first miss; it is read at most once per process and left in place.
+    
+    Args:
+        cache_key (str): Cache key from get_cache_key
+        
+    Returns:
+        str: OSM XML data, or None if the area is not cached
+    """
+    cache_path = _cache_entry_path(cache_key)
+    if not os.path.exists(cache_path):
+        _migrate_osm_cache()
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def save_cached_osm_data(cache_key, osm_text):
+    """
+    Cache the OSM data of one area in its own file.
+    
+    The data is written to a temporary file in the cache directory first and
+    then moved into place, so an interrupted write never leaves a truncated
+    entry behind.
     
-    cache_path = os.path.join(cache_dir, cache_file)
-    with open(cache_path, 'w') as f:
-        json.dump(cache, f, indent=2)
+    Args:
+        cache_key (str): Cache key from get_cache_key
+        osm_text (str): OSM XML data
+    """
+    cache_dir = OSM_CONFIG.get('cache_dir', 'osm-cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(osm_text)
+        os.replace(tmp_path, _cache_entry_path(cache_key))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 def download_osm_data(bbox):
     """
@@ -77,13 +139,13 @@ def download_osm_data(bbox):
         ValueError: If bounding box coordinates are invalid
         Exception: If OSM data download fails
     """
-    cache = load_osm_cache()
     cache_key = get_cache_key(bbox)
     
     # Check if we have cached data
-    if cache_key in cache:
+    osm_text = load_cached_osm_data(cache_key)
+    if osm_text is not None:
         print("Using cached OSM data...")
-        return cache[cache_key].encode('utf-8')
+        return osm_text.encode('utf-8')
     
     min_lon, min_lat, max_lon, max_lat = bbox
     
@@ -126,7 +188,6 @@ def download_osm_data(bbox):
         raise Exception(f"Error downloading OSM data: {response.status_code}")
     
     # Cache the response
-    cache[cache_key] = response.text
-    save_osm_cache(cache)
+    save_cached_osm_data(cache_key, response.text)
     
     return response.content
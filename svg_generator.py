@@ -7,19 +7,23 @@ SVG Generator Module
 This module handles the creation of SVG maps from OSM data and KML features.
 """
 
-import xml.etree.ElementTree as ET
-import svgwrite
+from io import BytesIO
+from lxml import etree
 import math
 import logging
+from functools import partial, lru_cache
+from itertools import chain
 import numpy as np
-from shapely.geometry import Polygon, LineString, Point
-from shapely.ops import linemerge, unary_union
 
-from geo_utils import is_line_in_boundary, get_bounding_box
-from svg_styling import get_way_style, get_feature_style
-from coord_transform import lat_lon_to_xy, calculate_label_corners, project_point_to_line
-from coord_transform import transform_feature, transform_coordinates
+from geo_utils import lines_in_boundary, get_bounding_box, prepare_boundary
+from svg_styling import shared_way_style, way_tags, WAY_TAG_KEYS
+from coord_transform import calculate_label_corners, label_corner_offsets
+from coord_transform import project_point_to_segments, lat_lon_to_xy_batch
+from coord_transform import transform_coordinates
 from config_parser import load_config
+from label_index import LabelIndex, boxes_overlap, rectangles_intersect, intersection_area
+from label_kernels import NUMBA_AVAILABLE, SNAP_SCORE_WEIGHTS, best_snap_segment, overlap_area_sum
+from svg_writer import SvgWriter, SvgGroup, SvgTemplate
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -28,6 +32,32 @@ logger = logging.getLogger(__name__)
 config = load_config()
 SVG_CONFIG = config.get('svg', {})
 
+# Shared attributes of the road name text and its white halo
+ROAD_LABEL_FONT = {'font_family': 'Arial, sans-serif', 'font_size': '12px', 'text_anchor': 'middle'}
+ROAD_LABEL_HALO = {'fill': 'none', 'stroke': 'white', 'stroke_width': 3,
+                   'stroke_linecap': 'round', 'stroke_linejoin': 'round'}
+# The halo and the fill reference the label text defined once in <defs>
+ROAD_LABEL_HALO_USE = SvgTemplate('use', ('href',), **ROAD_LABEL_HALO)
+ROAD_LABEL_FILL_USE = SvgTemplate('use', ('href',), fill='#333333')
+
+# Extra space kept free around each label, in SVG units
+LABEL_BUFFER_DISTANCE = 20
+
+# Up to this many points, scoring road segments in plain Python beats numpy dispatch
+SMALL_ROAD_POINTS = 8
+
+# Path coordinate format; screen coordinates need no more than a few decimals
+_COORD = '%.{0}f'.format(int(SVG_CONFIG.get('coordinate_precision', 1)))
+_PATH_POINT = _COORD + ',' + _COORD
+_PATH_MOVE = 'M ' + _PATH_POINT
+_PATH_LINE = ' L ' + _PATH_POINT
+
+# Parking symbol, defined once and referenced at the center of each parking area
+PARKING_SYMBOL_ID = 'parking-P'
+PARKING_SYMBOL = {'font_family': 'Arial, sans-serif', 'font_size': '14px', 'text_anchor': 'middle',
+                  'dominant_baseline': 'middle', 'font_weight': 'bold', 'fill': '#666666'}
+PARKING_SYMBOL_USE = SvgTemplate('use', ('x', 'y'), href=f'#{PARKING_SYMBOL_ID}')
+
 def create_svg_map(osm_data, boundary_coords, output_file, svg_width=None, svg_height=None, 
                    kml_features=None, kml_styles=None, skip_labels=False, debug_bounds=False):
     """
@@ -51,27 +81,28 @@ def create_svg_map(osm_data, boundary_coords, output_file, svg_width=None, svg_h
     bbox = get_bounding_box(boundary_coords)
     
     # Initialize SVG with white background
-    dwg = svgwrite.Drawing(output_file, (svg_width, svg_height))
-    dwg.add(dwg.rect(insert=(0, 0), size=(svg_width, svg_height), fill='white'))
+    dwg = SvgWriter(output_file, svg_width, svg_height)
+    dwg.rect(0, 0, svg_width, svg_height, fill='white')
     
     # Create groups for different layers
-    background_group = dwg.g(id='background')
-    natural_group = dwg.g(id='natural-features')
-    landuse_group = dwg.g(id='landuse')
-    kml_group = dwg.g(id='kml-features')
-    building_group = dwg.g(id='buildings')
-    road_group = dwg.g(id='roads')
-    path_group = dwg.g(id='paths')
-    parking_group = dwg.g(id='parking')
-    point_group = dwg.g(id='points')
-    text_group = dwg.g(id='text')
-    
-    # Add background pattern for transparency
-    add_background_pattern(dwg, background_group, svg_width, svg_height)
+    background_group = SvgGroup(id='background')
+    natural_group = SvgGroup(id='natural-features')
+    landuse_group = SvgGroup(id='landuse')
+    kml_group = SvgGroup(id='kml-features')
+    building_group = SvgGroup(id='buildings')
+    road_group = SvgGroup(id='roads')
+    path_group = SvgGroup(id='paths')
+    parking_group = SvgGroup(id='parking')
+    point_group = SvgGroup(id='points')
+    text_group = SvgGroup(id='text')
+    
+    # Add background pattern for transparency (viewers rasterize it per tile)
+    if SVG_CONFIG.get('background_pattern', True):
+        add_background_pattern(dwg, background_group, svg_width, svg_height)
     
     # Initialize set to track added street names
     added_names = set()    # Track label positions to prevent overlaps
-    used_label_areas = []
+    used_label_areas = LabelIndex()
     
     # Always draw the boundary as a thin grey line
     draw_boundary(dwg, background_group, boundary_coords, bbox, svg_width, svg_height)
@@ -106,28 +137,40 @@ def create_svg_map(osm_data, boundary_coords, output_file, svg_width=None, svg_h
 
 def add_background_pattern(dwg, group, width, height):
     """Add a subtle background pattern to the map"""
-    pattern = dwg.pattern(id='bg_pattern', size=(10, 10), patternUnits="userSpaceOnUse")
-    pattern.add(dwg.rect((0, 0), (10, 10), fill='#F8F8F8'))
-    pattern.add(dwg.line((0, 0), (10, 10), stroke='#F0F0F0', stroke_width=0.5))
+    pattern = dwg.defs.add(SvgGroup('pattern', height=10, id='bg_pattern', patternUnits='userSpaceOnUse', width=10))
+    pattern.rect(0, 0, 10, 10, fill='#F8F8F8')
+    pattern.line(0, 0, 10, 10, stroke='#F0F0F0', stroke_width=0.5)
+    
+    group.rect(0, 0, width, height, fill='url(#bg_pattern)')
+
+def path_data(svg_points, closed=False):
+    """
+    Build SVG path data for a polyline or polygon with a single %-format call.
+    
+    Coordinates are written with SVG_CONFIG['coordinate_precision'] decimals.
     
-    dwg.defs.add(pattern)
-    group.add(dwg.rect((0, 0), (width, height), fill='url(#bg_pattern)'))
+    Args:
+        svg_points (list or numpy.ndarray): List or (n, 2) array of (x, y) SVG coordinates
+        closed (bool, optional): Close the path with Z. Defaults to False.
+        
+    Returns:
+        str: Path data of the form "M x,y L x,y ... [Z]"
+    """
+    if isinstance(svg_points, np.ndarray):
+        coords = tuple(svg_points.ravel().tolist())
+    else:
+        coords = tuple(chain.from_iterable(svg_points))
+    d = (_PATH_MOVE + _PATH_LINE * (len(svg_points) - 1)) % coords
+    return d + ' Z' if closed else d
 
 def draw_boundary(dwg, group, boundary_coords, bbox, svg_width, svg_height):
     """Draw the boundary polygon as a thin grey line"""
     svg_points = transform_coordinates(boundary_coords, bbox, svg_width, svg_height)
     
     # Create boundary path
-    poly_path = f'M {svg_points[0][0]},{svg_points[0][1]}'
-    for x, y in svg_points[1:]:
-        poly_path += f' L {x},{y}'
-    poly_path += ' Z'
-    
-    path = dwg.path(d=poly_path)
-    path['fill'] = 'none'
-    path['stroke'] = '#999999'  # Grey color
-    path['stroke-width'] = 1    # Thin line
-    group.add(path)
+    group.path(path_data(svg_points, closed=True), fill='none',
+               stroke='#999999',  # Grey color
+               stroke_width=1)    # Thin line
 
 def process_kml_features(dwg, kml_group, kml_features, kml_styles, boundary_coords, bbox, 
                         svg_width, svg_height, text_group, used_label_areas, skip_labels):
@@ -135,9 +178,9 @@ def process_kml_features(dwg, kml_group, kml_features, kml_styles, boundary_coor
     logger.info(f"Processing KML features (outlines only)")
     
     # Create subgroups for different feature types
-    polygon_group = dwg.g(id='kml-polygons')
-    line_group = dwg.g(id='kml-lines')
-    point_group = dwg.g(id='kml-points')
+    polygon_group = SvgGroup(id='kml-polygons')
+    line_group = SvgGroup(id='kml-lines')
+    point_group = SvgGroup(id='kml-points')
     
     # We'll only add the boundary polygon as a thin grey line
     # The actual KML features won't be rendered
@@ -151,189 +194,255 @@ def process_osm_data(dwg, osm_data, boundary_coords, bbox, svg_width, svg_height
                   natural_group, landuse_group, building_group, road_group, path_group, 
                   parking_group, text_group, added_names, used_label_areas, skip_labels):
     """Process and render OSM data"""
-    # Parse XML
-    root = ET.fromstring(osm_data)
-    nodes = {n.attrib['id']: (float(n.attrib['lat']), float(n.attrib['lon'])) 
-             for n in root.findall('node')}
-    # Collection for grouping road segments by name
+    # Parse XML in a single streaming pass
+    node_ids, lats, lons, ways = _parse_osm(osm_data)
+    # The boundary is fixed for the whole pass, so prepare it once for all ways
+    boundary = prepare_boundary(boundary_coords)
+    # Project every node to SVG coordinates once; ways gather their rows by node index
+    node_index = dict(zip(node_ids, range(len(node_ids))))
+    node_lonlat = np.column_stack([lons, lats])
+    node_xy = lat_lon_to_xy_batch(lats, lons, bbox, svg_width, svg_height)
+    # Gather every way's coordinates; ways with no known node are left out
+    gather = partial(_gather_way, node_index=node_index, node_lonlat=node_lonlat, node_xy=node_xy)
+    gathered_ways = [gathered for gathered in map(gather, ways) if gathered is not None]
+    # Test all ways against the boundary in one vectorized pass, then style them
+    inside = lines_in_boundary([way_nodes for _, _, way_nodes, _ in gathered_ways], boundary).tolist()
+    prepared_ways = [(way_id, tags, way_nodes, svg_points, is_inside, shared_way_style(tags, is_inside))
+                     for (way_id, tags, way_nodes, svg_points), is_inside in zip(gathered_ways, inside)]
+    # Collection for grouping road segments by name, as (n, 2) arrays in SVG coordinates
     roads_by_name = {}
-    # First pass: collect all roads
-    for way in root.findall('way'):
-        way_nodes = []
-        tags = {tag.attrib['k']: tag.attrib['v'] for tag in way.findall('tag')}
-        road_name = tags.get('name')
-        if 'highway' in tags and road_name and not skip_labels:
-            # Get coordinates for way
-            for nd in way.findall('nd'):
-                if nd.attrib['ref'] in nodes:
-                    lat, lon = nodes[nd.attrib['ref']]
-                    way_nodes.append((lon, lat))
-            if way_nodes:
-                if road_name not in roads_by_name:
-                    roads_by_name[road_name] = {'segments': [], 'tags': tags, 'inside_segments': []}
-                # Check if this segment is inside the boundary
-                is_inside = is_line_in_boundary(way_nodes, boundary_coords)
-                roads_by_name[road_name]['segments'].append(way_nodes)
-                if is_inside:
-                    roads_by_name[road_name]['inside_segments'].append(way_nodes)
-    # Add road labels
     if not skip_labels:
+        for way_id, tags, way_nodes, svg_points, is_inside, style in prepared_ways:
+            road_name = tags.name
+            if tags.highway is not None and road_name:
+                if road_name not in roads_by_name:
+                    roads_by_name[road_name] = {'svg_segments': [], 'tags': tags}
+                if len(svg_points) > 1:
+                    roads_by_name[road_name]['svg_segments'].append(np.asarray(svg_points, dtype=np.float64))
+        # Add road labels
         add_road_labels(dwg, roads_by_name, boundary_coords, bbox, svg_width, svg_height, 
                         text_group, added_names, used_label_areas)
-    # Process ways for drawing roads and other features
-    for way in root.findall('way'):
-        way_nodes = []
-        tags = {tag.attrib['k']: tag.attrib['v'] for tag in way.findall('tag')}
-        for nd in way.findall('nd'):
-            if nd.attrib['ref'] in nodes:
-                lat, lon = nodes[nd.attrib['ref']]
-                way_nodes.append((lon, lat))
-        if not way_nodes:
-            continue
-        is_inside = is_line_in_boundary(way_nodes, boundary_coords)
-        style = get_way_style(tags, is_inside)
-        if not style:
-            continue
-        svg_points = []
-        for lon, lat in way_nodes:
-            x, y = lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height)
-            svg_points.append((x, y))
-        if len(svg_points) < 2:
+    # Draw roads and other features, emitting SVG elements in document order
+    parking_symbol_defined = False
+    for way_id, tags, way_nodes, svg_points, is_inside, style in prepared_ways:
+        if not style or len(svg_points) < 2:
             continue
         if style.get('type') == 'road':
-            if style.get('casing'):
-                path = dwg.path(d=f'M {svg_points[0][0]},{svg_points[0][1]}')
-                for x, y in svg_points[1:]:
-                    path.push(f'L {x},{y}')
-                path['stroke'] = style.get('casing-color', '#000000')
-                path['stroke-width'] = style.get('casing-width', 1)
-                path['fill'] = 'none'
-                road_group.add(path)
-            path = dwg.path(d=f'M {svg_points[0][0]},{svg_points[0][1]}')
-            for x, y in svg_points[1:]:
-                path.push(f'L {x},{y}')
-            path['stroke'] = style.get('stroke', '#000000')
-            path['stroke-width'] = style.get('stroke-width', 1)
-            path['fill'] = 'none'
-            path['stroke-opacity'] = style.get('opacity', 1)
-            if style.get('is_path'):
-                path_group.add(path)
-            else:
-                road_group.add(path)
+            # Define the road geometry once and reference it for both casing and stroke
+            path_id = f"w{way_id}"
+            dwg.defs.path(path_data(svg_points), id=path_id)
+            casing, line = _road_templates(_style_key(style))
+            if casing:
+                road_group.instance(casing, f'#{path_id}')
+            line_group = path_group if style.get('is_path') else road_group
+            line_group.instance(line, f'#{path_id}')
         elif style.get('type') == 'polygon':
-            poly_path = f'M {svg_points[0][0]},{svg_points[0][1]}'
-            for x, y in svg_points[1:]:
-                poly_path += f' L {x},{y}'
-            poly_path += ' Z'
-            path = dwg.path(d=poly_path)
-            path['fill'] = style.get('fill', '#000000')
-            path['stroke'] = style.get('stroke', 'none')
-            path['stroke-width'] = style.get('stroke-width', 1)
-            path['fill-opacity'] = style.get('opacity', 1)
-            path['stroke-opacity'] = style.get('opacity', 1)
-            if 'natural' in tags or tags.get('waterway'):
-                natural_group.add(path)
-            elif 'landuse' in tags or 'leisure' in tags:
-                landuse_group.add(path)
-            elif 'building' in tags:
-                building_group.add(path)
-            elif tags.get('amenity') == 'parking':
-                parking_group.add(path)
+            if tags.natural is not None or tags.waterway:
+                polygon_group = natural_group
+            elif tags.landuse is not None or tags.leisure is not None:
+                polygon_group = landuse_group
+            elif tags.building is not None:
+                polygon_group = building_group
+            elif tags.amenity == 'parking':
+                polygon_group = parking_group
+            else:
+                continue
+            # Runs of polygons with the same style share one styled <g>
+            polygon_group.styled(**_polygon_attrs(_style_key(style))).path(path_data(svg_points, closed=True))
+            if polygon_group is parking_group:
                 # Add parking symbol
-                center_x = sum(p[0] for p in svg_points) / len(svg_points)
-                center_y = sum(p[1] for p in svg_points) / len(svg_points)
-                parking_text = dwg.text("P", insert=(center_x, center_y))
-                parking_text['font-family'] = 'Arial, sans-serif'
-                parking_text['font-size'] = '14px'
-                parking_text['text-anchor'] = 'middle'
-                parking_text['dominant-baseline'] = 'middle'
-                parking_text['font-weight'] = 'bold'
-                parking_text['fill'] = '#666666'
-                parking_group.add(parking_text)
+                center_x, center_y = np.asarray(svg_points, dtype=np.float64).mean(axis=0).tolist()
+                if not parking_symbol_defined:
+                    dwg.defs.text('P', 0, 0, id=PARKING_SYMBOL_ID, **PARKING_SYMBOL)
+                    parking_symbol_defined = True
+                parking_group.instance(PARKING_SYMBOL_USE, _COORD % center_x, _COORD % center_y)
+
+def _style_key(style):
+    """Hashable key of a way style dictionary"""
+    return tuple(sorted(style.items()))
+
+@lru_cache(maxsize=None)
+def _road_templates(style_key):
+    """
+    Build the <use> templates of a road style, keyed by _style_key.
+    
+    Returns:
+        tuple: (casing template or None, line template)
+    """
+    style = dict(style_key)
+    casing = None
+    if style.get('casing'):
+        casing = SvgTemplate('use', ('href',), stroke=style.get('casing-color', '#000000'),
+                             stroke_width=style.get('casing-width', 1), fill='none')
+    line = SvgTemplate('use', ('href',), stroke=style.get('stroke', '#000000'),
+                       stroke_width=style.get('stroke-width', 1), fill='none',
+                       stroke_opacity=style.get('opacity', 1))
+    return casing, line
+
+@lru_cache(maxsize=None)
+def _polygon_attrs(style_key):
+    """Build the presentation attributes of a polygon style, keyed by _style_key"""
+    style = dict(style_key)
+    return {'fill': style.get('fill', '#000000'), 'stroke': style.get('stroke', 'none'),
+            'stroke_width': style.get('stroke-width', 1), 'fill_opacity': style.get('opacity', 1),
+            'stroke_opacity': style.get('opacity', 1)}
+
+@lru_cache(maxsize=2)
+def _parse_osm(osm_data):
+    """
+    Read nodes and ways from OSM XML in one streaming pass.
+    
+    Elements are cleared as soon as they are read, so memory holds the extracted
+    values rather than the whole document tree. The result does not depend on
+    the map size or boundary, so it is cached for maps drawn again from the same
+    data; it is returned as tuples and read-only arrays so it can be shared.
+    The cache keeps the last two OSM payloads and their parsed data alive until
+    the process exits or _parse_osm.cache_clear() is called.
+    
+    Args:
+        osm_data (bytes): OSM XML data
+        
+    Returns:
+        tuple: (node ids, latitude array, longitude array, tuple of (way id, WayTags, node refs))
+    """
+    node_ids = []
+    lats = []
+    lons = []
+    ways = []
+    for _, elem in etree.iterparse(BytesIO(osm_data), events=('end',), tag=('node', 'way')):
+        if elem.tag == 'node':
+            node_ids.append(elem.get('id'))
+            lats.append(float(elem.get('lat')))
+            lons.append(float(elem.get('lon')))
+        else:
+            tags, refs = _read_way(elem)
+            ways.append((elem.get('id'), tags, refs))
+        # Free the element and the already processed siblings
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    lats = np.array(lats, dtype=np.float64)
+    lons = np.array(lons, dtype=np.float64)
+    lats.flags.writeable = False
+    lons.flags.writeable = False
+    return tuple(node_ids), lats, lons, tuple(ways)
+
+def _read_way(way):
+    """
+    Read a way's tags and node references in a single pass over its children.
+    
+    Only the tags used for styling and labelling are kept.
+    
+    Args:
+        way (Element): OSM way element
+        
+    Returns:
+        tuple: (WayTags, tuple of node reference ids)
+    """
+    tags = {}
+    refs = []
+    for child in way:
+        if child.tag == 'tag':
+            key = child.get('k')
+            if key in WAY_TAG_KEYS:
+                tags[key] = child.get('v')
+        elif child.tag == 'nd':
+            refs.append(child.get('ref'))
+    return way_tags(tags), tuple(refs)
+
+def _gather_way(way, node_index, node_lonlat, node_xy):
+    """
+    Gather a way's geographic and SVG coordinates from the node tables.
+    
+    Args:
+        way (tuple): (way id, WayTags, node refs) from _parse_osm
+        node_index (dict): Node id to row index in the node arrays
+        node_lonlat (numpy.ndarray): (n, 2) array of node (longitude, latitude)
+        node_xy (numpy.ndarray): (n, 2) array of node SVG coordinates
+        
+    Returns:
+        tuple: (way_id, tags, way_nodes, svg_points), or None if no node is known
+    """
+    way_id, tags, refs = way
+    rows = [row for row in map(node_index.get, refs) if row is not None]
+    if not rows:
+        return None
+    # One fancy-index per node table
+    return way_id, tags, node_lonlat[rows], node_xy[rows]
 
 def add_road_labels(dwg, roads_by_name, boundary_coords, bbox, svg_width, svg_height, 
                     text_group, added_names, used_label_areas):
     """Add labels for roads"""
-    from shapely.geometry import Polygon, LineString
-    from shapely.ops import linemerge
     for road_name, road_data in roads_by_name.items():
-        if not road_data['segments']:
-            continue
-        # Merge all segments (not just inside ones)
-        all_lines = [LineString(seg) for seg in road_data['segments'] if len(seg) > 1]
-        if not all_lines:
+        svg_segments = road_data['svg_segments']
+        # Only roads with at least one drawable segment (inside or not) get a label
+        if not svg_segments:
             continue
-        merged = linemerge(all_lines)
-        # Collect all coordinates from all segments for true geometric center
-        all_coords = []
-        for seg in road_data['segments']:
-            all_coords.extend(seg)
-        if not all_coords:
+        text_width = len(road_name) * 6
+        text_height = 12
+        # Skip roads where no single way is long enough to carry the name
+        if max(_polyline_length(svg_seg) for svg_seg in svg_segments) < text_width:
             continue
         # Compute geometric center of all segments (in SVG coordinates)
-        svg_all_points = [lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height) for lon, lat in all_coords]
-        geo_center_x = sum(p[0] for p in svg_all_points) / len(svg_all_points)
-        geo_center_y = sum(p[1] for p in svg_all_points) / len(svg_all_points)
+        geo_center_x, geo_center_y = np.concatenate(svg_segments).mean(axis=0).tolist()
         road_center = (geo_center_x, geo_center_y)
-        # Find the closest point on any segment to the geometric center
-        min_dist = float('inf')
-        best_point = None
-        best_angle = 0
-        best_svg_points = None
-        for line in all_lines:
-            svg_points = [lat_lon_to_xy(lat, lon, bbox, svg_width, svg_height) for lon, lat in line.coords]
-            for i in range(len(svg_points) - 1):
-                p1, p2 = svg_points[i], svg_points[i + 1]
-                proj = project_point_to_line(road_center, p1, p2)
-                dist = ((road_center[0] - proj[0])**2 + (road_center[1] - proj[1])**2)**0.5
-                if dist < min_dist:
-                    min_dist = dist
-                    best_point = proj
-                    dx = p2[0] - p1[0]
-                    dy = p2[1] - p1[1]
-                    angle = math.degrees(math.atan2(dy, dx))
-                    if angle < -90 or angle > 90:
-                        dx = -dx
-                        dy = -dy
-                        angle = math.degrees(math.atan2(dy, dx))
-                    best_angle = angle
-                    best_svg_points = svg_points
-        if best_point is None or best_svg_points is None:
-            continue
-        text_width = len(road_name) * 6
-        text_height = 12
+        # Find the closest point on any segment to the geometric center, over the edges of all ways at once
+        starts = np.concatenate([svg_points[:-1] for svg_points in svg_segments])
+        ends = np.concatenate([svg_points[1:] for svg_points in svg_segments])
+        _, best_index, best_point = project_point_to_segments(road_center, starts, ends)
+        best_angle = readable_angle(*(ends[best_index] - starts[best_index]).tolist())
+        # The way holding the closest edge is the one the label is snapped to
+        way_ends = np.cumsum([len(svg_points) - 1 for svg_points in svg_segments])
+        best_svg_points = svg_segments[int(np.searchsorted(way_ends, best_index, side='right'))]
         # Snap label to the best position on the road
         label_x, label_y = snap_label_to_road(best_point[0], best_point[1], best_angle, best_svg_points, 0, text_width, text_height, road_center)
-        if not check_label_collision(label_x, label_y, text_width, text_height, best_angle, used_label_areas)[0]:
-            text = dwg.text(road_name)
-            text['x'] = label_x
-            text['y'] = label_y
-            text['font-family'] = 'Arial, sans-serif'
-            text['font-size'] = '12px'
-            text['text-anchor'] = 'middle'
-            text['fill'] = '#333333'
-            if best_angle != 0:
-                text['transform'] = f'rotate({best_angle} {label_x} {label_y})'
-            # Add white outline/background for better readability
-            bg = dwg.text(road_name)
-            bg['x'] = label_x
-            bg['y'] = label_y
-            bg['font-family'] = 'Arial, sans-serif'
-            bg['font-size'] = '12px'
-            bg['text-anchor'] = 'middle'
-            bg['fill'] = 'none'
-            bg['stroke'] = 'white'
-            bg['stroke-width'] = 3
-            bg['stroke-linecap'] = 'round'
-            bg['stroke-linejoin'] = 'round'
-            if best_angle != 0:
-                bg['transform'] = f'rotate({best_angle} {label_x} {label_y})'
-            text_group.add(bg)
-            text_group.add(text)
-            # Add to used areas
-            corners = calculate_label_corners(label_x, label_y, text_width, text_height, best_angle)
-            used_label_areas.append(Polygon(corners))
-            added_names.add(road_name)
+        label_x, label_y = slide_label_along_road(label_x, label_y, text_width, text_height, best_angle, used_label_areas)
+        label_attrs = dict(ROAD_LABEL_FONT)
+        if best_angle != 0:
+            label_attrs['transform'] = f'rotate({best_angle} {label_x} {label_y})'
+        # Define the text once and reference it for both the halo and the fill
+        label_id = f"label{len(used_label_areas)}"
+        dwg.defs.text(road_name, label_x, label_y, id=label_id, **label_attrs)
+        # Add white outline/background for better readability
+        text_group.instance(ROAD_LABEL_HALO_USE, f'#{label_id}')
+        text_group.instance(ROAD_LABEL_FILL_USE, f'#{label_id}')
+        # Add to used areas
+        used_label_areas.add(label_corner_offsets(text_width, text_height, best_angle) + (label_x, label_y))
+        added_names.add(road_name)
+
+def _polyline_length(points):
+    """Return the length of a polyline given as a list of (x, y) points"""
+    if len(points) < 2:
+        return 0.0
+    deltas = np.diff(np.asarray(points, dtype=np.float64), axis=0)
+    return float(np.hypot(deltas[:, 0], deltas[:, 1]).sum())
+
+def slide_label_along_road(x, y, width, height, angle, used_label_areas, buffer_distance=LABEL_BUFFER_DISTANCE):
+    """
+    Find a free position for a road label, sliding it along the road direction first.
+    
+    Args:
+        x, y (float): Snapped label position on the road
+        width, height (float): Dimensions of the label
+        angle (float): Rotation angle of the label (the road direction) in degrees
+        used_label_areas (LabelIndex): Areas of the labels placed so far
+        buffer_distance (float): Extra buffer distance around the label to avoid close placement
+    
+    Returns:
+        tuple: (x, y) position for the label
+    """
+    area_offsets, text_offsets = label_corner_offsets(width, height, angle, [buffer_distance, 0])
+    if _label_fits(np.array([x, y]), area_offsets, text_offsets, used_label_areas, buffer_distance):
+        return x, y
+    # Slide by half and then a full label width each way, staying on the road line
+    step_x = math.cos(math.radians(angle)) * width / 2
+    step_y = math.sin(math.radians(angle)) * width / 2
+    for t in (-1, 1, -2, 2):
+        slid_x, slid_y = x + t * step_x, y + t * step_y
+        if _label_fits(np.array([slid_x, slid_y]), area_offsets, text_offsets, used_label_areas, buffer_distance):
+            return slid_x, slid_y
+    # Fall back to the offsets around the original position
+    return check_label_collision(x, y, width, height, angle, used_label_areas, buffer_distance)[1]
 
 def render_polygon(dwg, group, feature, style):
     """Render a polygon feature"""
@@ -341,19 +450,9 @@ def render_polygon(dwg, group, feature, style):
     if len(svg_points) < 3:
         return
     
-    poly_path = f'M {svg_points[0][0]},{svg_points[0][1]}'
-    for x, y in svg_points[1:]:
-        poly_path += f' L {x},{y}'
-    poly_path += ' Z'
-    
-    path = dwg.path(d=poly_path)
-    path['fill'] = style.get('fill', '#3388FF')
-    path['stroke'] = style.get('stroke', '#0066CC')
-    path['stroke-width'] = style.get('stroke-width', 1)
-    path['fill-opacity'] = style.get('opacity', 0.7)
-    path['stroke-opacity'] = style.get('opacity', 0.9)
-    
-    group.add(path)
+    group.path(path_data(svg_points, closed=True), fill=style.get('fill', '#3388FF'),
+               stroke=style.get('stroke', '#0066CC'), stroke_width=style.get('stroke-width', 1),
+               fill_opacity=style.get('opacity', 0.7), stroke_opacity=style.get('opacity', 0.9))
 
 def render_linestring(dwg, group, feature, style):
     """Render a linestring feature"""
@@ -361,16 +460,9 @@ def render_linestring(dwg, group, feature, style):
     if len(svg_points) < 2:
         return
     
-    path = dwg.path(d=f'M {svg_points[0][0]},{svg_points[0][1]}')
-    for x, y in svg_points[1:]:
-        path.push(f'L {x},{y}')
-    
-    path['stroke'] = style.get('stroke', '#3388FF')
-    path['stroke-width'] = style.get('stroke-width', 2)
-    path['fill'] = 'none'
-    path['stroke-opacity'] = style.get('opacity', 0.9)
-    
-    group.add(path)
+    group.path(path_data(svg_points), stroke=style.get('stroke', '#3388FF'),
+               stroke_width=style.get('stroke-width', 2), fill='none',
+               stroke_opacity=style.get('opacity', 0.9))
 
 def render_point(dwg, group, feature, style):
     """Render a point feature"""
@@ -386,13 +478,10 @@ def render_point(dwg, group, feature, style):
         pass
     else:
         # Default to circle
-        circle = dwg.circle(center=(x, y), r=radius)
-        circle['fill'] = style.get('fill', '#3388FF')
-        circle['stroke'] = style.get('stroke', '#FFFFFF')
-        circle['stroke-width'] = style.get('stroke-width', 1)
-        circle['fill-opacity'] = style.get('opacity', 0.9)
-        
-        group.add(circle)
+        group.circle(x, y, radius, fill=style.get('fill', '#3388FF'),
+                     stroke=style.get('stroke', '#FFFFFF'),
+                     stroke_width=style.get('stroke-width', 1),
+                     fill_opacity=style.get('opacity', 0.9))
 
 def render_multigeometry(dwg, polygon_group, line_group, point_group, feature, style):
     """Render a multigeometry feature"""
@@ -451,12 +540,10 @@ def add_feature_label(dwg, text_group, feature, used_label_areas):
         if not best_coords:
             return
             
-        center_x = sum(p[0] for p in best_coords) / len(best_coords)
-        center_y = sum(p[1] for p in best_coords) / len(best_coords)
+        center_x, center_y = np.asarray(best_coords, dtype=np.float64).mean(axis=0).tolist()
     else:
         # For normal features
-        center_x = sum(p[0] for p in svg_coords) / len(svg_coords)
-        center_y = sum(p[1] for p in svg_coords) / len(svg_coords)
+        center_x, center_y = np.asarray(svg_coords, dtype=np.float64).mean(axis=0).tolist()
     
     # Add the label if it doesn't collide
     text_width = len(name) * 6
@@ -465,29 +552,17 @@ def add_feature_label(dwg, text_group, feature, used_label_areas):
     has_collision, (label_x, label_y) = check_label_collision(center_x, center_y, text_width, text_height, 0, used_label_areas)
     
     if not has_collision:        
-        text = dwg.text(name, insert=(label_x, label_y))
-        text['font-family'] = 'Arial, sans-serif'
-        text['font-size'] = '12px'
-        text['text-anchor'] = 'middle'
-        text['dominant-baseline'] = 'middle'
-        text['fill'] = '#333333'
-        
         # Add background for better readability
         padding = 2
-        bg = dwg.rect(
-            insert=(label_x - text_width/2 - padding, label_y - text_height/2 - padding),
-            size=(text_width + 2*padding, text_height + 2*padding),
-            rx=2, ry=2
-        )
-        bg['fill'] = 'white'
-        bg['fill-opacity'] = 0.7
-        
-        text_group.add(bg)
-        text_group.add(text)
+        text_group.rect(label_x - text_width/2 - padding, label_y - text_height/2 - padding,
+                        text_width + 2*padding, text_height + 2*padding,
+                        rx=2, ry=2, fill='white', fill_opacity=0.7)
+        text_group.text(name, label_x, label_y, font_family='Arial, sans-serif', font_size='12px',
+                        text_anchor='middle', dominant_baseline='middle', fill='#333333')
         
         # Add to used areas
         corners = calculate_label_corners(label_x, label_y, text_width, text_height, 0)
-        used_label_areas.append(Polygon(corners))
+        used_label_areas.add(corners)
 
 def add_point_label(dwg, text_group, feature, used_label_areas):
     """Add a label for a point feature"""
@@ -509,159 +584,149 @@ def add_point_label(dwg, text_group, feature, used_label_areas):
     has_collision, (label_x, label_y) = check_label_collision(label_x, label_y, text_width, text_height, 0, used_label_areas)
     
     if not has_collision:
-        text = dwg.text(name, insert=(label_x, label_y))
-        text['font-family'] = 'Arial, sans-serif'
-        text['font-size'] = '12px'
-        text['text-anchor'] = 'middle'
-        text['fill'] = '#333333'
-        
         # Add background for better readability
         padding = 2
-        bg = dwg.rect(
-            insert=(label_x - text_width/2 - padding, label_y - text_height/2 - padding),
-            size=(text_width + 2*padding, text_height + 2*padding),
-            rx=2, ry=2
-        )
-        bg['fill'] = 'white'
-        bg['fill-opacity'] = 0.7
-        
-        text_group.add(bg)
-        text_group.add(text)
+        text_group.rect(label_x - text_width/2 - padding, label_y - text_height/2 - padding,
+                        text_width + 2*padding, text_height + 2*padding,
+                        rx=2, ry=2, fill='white', fill_opacity=0.7)
+        text_group.text(name, label_x, label_y, font_family='Arial, sans-serif', font_size='12px',
+                        text_anchor='middle', fill='#333333')
         
         # Add to used areas
         corners = calculate_label_corners(label_x, label_y, text_width, text_height, 0)
-        used_label_areas.append(Polygon(corners))
+        used_label_areas.add(corners)
 
-def check_label_collision(x, y, width, height, angle, used_label_areas, buffer_distance=20):
+# Alternative label positions tried by check_label_collision.
+# Cardinal directions at different distances come first as priority positions;
+# reduced distances keep labels closer to roads.
+_CARDINAL_OFFSETS = [
+    (0, -15), (0, 15),     # North, South - closer positions
+    (-15, 0), (15, 0),     # West, East - closer positions
+    (0, -25), (0, 25),     # Further North, South
+    (-25, 0), (25, 0),     # Further West, East
+    (10, 10), (-10, 10),   # Diagonal directions
+    (10, -10), (-10, -10) # Diagonal directions
+]
+
+def _spiral_offsets(max_distance=40, steps=12, rings=3):
+    """Spiral pattern of positions further away from the original point, ring by ring"""
+    angles = 2 * np.pi * np.arange(steps) / steps
+    distances = np.arange(1, rings + 1) * (max_distance / rings)
+    return np.stack([np.outer(distances, np.cos(angles)).ravel(),
+                     np.outer(distances, np.sin(angles)).ravel()], axis=1)
+
+_RETRY_OFFSETS = _CARDINAL_OFFSETS + [tuple(offset) for offset in _spiral_offsets().tolist()]
+# Per-offset shift of a (minx, miny, maxx, maxy) box, and the extent covered by all of them
+_RETRY_SHIFTS = np.tile(np.array(_RETRY_OFFSETS, dtype=np.float64), 2)
+_RETRY_REACH = np.concatenate([_RETRY_SHIFTS[:, :2].min(axis=0), _RETRY_SHIFTS[:, 2:].max(axis=0)])
+
+def _label_fits(center, area_offsets, text_offsets, used_label_areas, buffer_distance):
     """
-    Check if a label area collides with existing labels and find alternative positions if needed.
+    Check a label position using corner offsets from label_corner_offsets.
     
     Args:
-        x, y (float): Center coordinates of the label
-        width, height (float): Dimensions of the label
-        angle (float): Rotation angle of the label in degrees
-        used_label_areas (list): List of existing label areas as Shapely Polygons
-        buffer_distance (float): Extra buffer distance around the label to avoid close placement
+        center (numpy.ndarray): (x, y) center of the label
+        area_offsets (numpy.ndarray): (4, 2) corner offsets of the buffered label area
+        text_offsets (numpy.ndarray): (4, 2) corner offsets of the text area
+        used_label_areas (LabelIndex): Areas of the labels placed so far
+        buffer_distance (float): Buffer distance the area offsets were built with
     
     Returns:
-        tuple: (collision_detected, (suggested_x, suggested_y))
+        bool: True if the label fits at this position
     """
-    # Create points for the four corners of the label area with buffer
-    corners = calculate_label_corners(x, y, width, height, angle, buffer_distance)
-    new_box = Polygon(corners)
-    
-    # Also create a box without buffer for checking actual text overlap
-    actual_text_corners = calculate_label_corners(x, y, width, height, angle, 0)
-    actual_text_box = Polygon(actual_text_corners)
-    
-    # Define a more comprehensive set of alternative positions to try
-    # This spiral pattern tries positions further away from the original point
-    spiral_offsets = []
-    max_distance = 40  # Maximum distance to try (reduced from 60 to keep labels closer to roads)
-    steps = 12  # Number of positions to try around each ring
-    rings = 3   # Number of distance rings
-    
-    for ring in range(1, rings+1):
-        distance = ring * (max_distance / rings)
-        for step in range(steps):
-            angle_rad = 2 * np.pi * step / steps
-            dx = distance * np.cos(angle_rad)
-            dy = distance * np.sin(angle_rad)
-            spiral_offsets.append((dx, dy))
-    
-    # Add cardinal directions at different distances as priority positions
-    # Reduced distances to keep labels closer to roads
-    cardinal_offsets = [
-        (0, -15), (0, 15),     # North, South - closer positions
-        (-15, 0), (15, 0),     # West, East - closer positions
-        (0, -25), (0, 25),     # Further North, South
-        (-25, 0), (25, 0),     # Further West, East
-        (10, 10), (-10, 10),   # Diagonal directions
-        (10, -10), (-10, -10) # Diagonal directions
-    ]
-    
-    # Combine cardinal directions with spiral pattern, prioritizing cardinal
-    retry_offsets = cardinal_offsets + spiral_offsets
+    # Corners of the label area with buffer
+    corners = center + area_offsets
+    corners_bounds = _corners_bounds(corners)
+    
+    # Also the text area without buffer for checking actual text overlap
+    actual_text_corners = center + text_offsets
     
     # Check collision with existing labels
     collision_found = False
     severe_collision = False
-    intersecting_areas = []
     
-    # First, identify all intersecting areas
-    for existing_area in used_label_areas:
+    # Only labels whose bounding boxes overlap need an exact rectangle test
+    hits = used_label_areas.query(corners_bounds)
+    if hits.size:
         # Check if buffer areas intersect (less severe)
-        if new_box.intersects(existing_area):
-            collision_found = True
-            intersecting_areas.append(existing_area)
-            
-            # Check if actual text areas intersect (more severe)
-            # Use centroid to approximate the text area of existing labels
-            existing_center = existing_area.centroid
-            # Estimate existing text dimensions (assuming similar buffer ratio)
-            existing_width = existing_area.bounds[2] - existing_area.bounds[0]
-            existing_height = existing_area.bounds[3] - existing_area.bounds[1]
-            estimated_text_width = existing_width * 0.8  # Estimate actual text width
-            estimated_text_height = existing_height * 0.8  # Estimate actual text height
-            
-            # Create approximate text area for existing label
-            existing_text_corners = calculate_label_corners(
-                existing_center.x, existing_center.y, 
-                estimated_text_width, estimated_text_height, 
-                0, 0  # No buffer
-            )
-            existing_text_box = Polygon(existing_text_corners)
-            
-            # Check for severe collision (actual text overlaps)
-            if actual_text_box.intersects(existing_text_box):
-                severe_collision = True
+        hits = hits[rectangles_intersect(corners, used_label_areas.corners[hits])]
+        collision_found = hits.size > 0
+    if collision_found:
+        # Check for severe collision (actual text overlaps)
+        existing_text_corners = used_label_areas.text_corners[hits]
+        severe_collision = bool(rectangles_intersect(actual_text_corners, existing_text_corners).any())
     
     # Allow slight buffer overlaps but no severe text overlaps
     if not collision_found or (collision_found and not severe_collision and buffer_distance > 10):
         # Accept this position if only buffer areas overlap but not text
+        return True
+    return False
+
+def check_label_collision(x, y, width, height, angle, used_label_areas, buffer_distance=LABEL_BUFFER_DISTANCE):
+    """
+    Check if a label area collides with existing labels and find alternative positions if needed.
+    
+    Args:
+        x, y (float): Center coordinates of the label
+        width, height (float): Dimensions of the label
+        angle (float): Rotation angle of the label in degrees
+        used_label_areas (LabelIndex): Areas of the labels placed so far
+        buffer_distance (float): Extra buffer distance around the label to avoid close placement
+    
+    Returns:
+        tuple: (collision_detected, (suggested_x, suggested_y))
+    """
+    # The rotation is the same for every candidate position, so only translate the corners
+    area_offsets, text_offsets = label_corner_offsets(width, height, angle, [buffer_distance, 0])
+    center = np.array([x, y])
+    if _label_fits(center, area_offsets, text_offsets, used_label_areas, buffer_distance):
         return False, (x, y)
     
+    corners_bounds = _corners_bounds(center + area_offsets)
+    actual_text_corners = center + text_offsets
+    
+    # Labels near any alternative position; text areas lie inside the label areas,
+    # so this also covers every possible text overlap
+    nearby = used_label_areas.query(corners_bounds + _RETRY_REACH)
+    nearby_bounds = used_label_areas.bounds[nearby]
+    nearby_text_bounds = used_label_areas.text_bounds[nearby]
+    
+    # Bounding boxes of every alternative position, tested against the nearby labels at once
+    alt_buffer_hits = boxes_overlap(corners_bounds + _RETRY_SHIFTS, nearby_bounds)
+    alt_text_hits = boxes_overlap(_corners_bounds(actual_text_corners) + _RETRY_SHIFTS, nearby_text_bounds)
+    
+    def text_overlaps_at(k, dx, dy):
+        candidates = np.flatnonzero(alt_text_hits[k])
+        if not candidates.size:
+            return False
+        alt_text_corners = actual_text_corners + (dx, dy)
+        return bool(rectangles_intersect(alt_text_corners, used_label_areas.text_corners[nearby[candidates]]).any())
+    
     # If collision found, try alternative positions
     # Prioritize positions with minimal overlap with existing labels
     min_overlap = float('inf')
     best_pos = (x, y)
     
     # For each offset, calculate overlap with ALL existing areas
-    for dx, dy in retry_offsets:
-        alt_corners = calculate_label_corners(x + dx, y + dy, width, height, angle, buffer_distance)
-        alt_box = Polygon(alt_corners)
-        
-        # Also create actual text box for this alternative position
-        alt_text_corners = calculate_label_corners(x + dx, y + dy, width, height, angle, 0)
-        alt_text_box = Polygon(alt_text_corners)
-        
+    for k, (dx, dy) in enumerate(_RETRY_OFFSETS):
         # Calculate total overlap with all existing areas
-        total_overlap = sum(alt_box.intersection(area).area for area in used_label_areas if alt_box.intersects(area))
-        
-        # Check for severe text overlaps at this position
-        text_overlaps = False
-        for existing_area in used_label_areas:
-            existing_center = existing_area.centroid
-            existing_width = existing_area.bounds[2] - existing_area.bounds[0]
-            existing_height = existing_area.bounds[3] - existing_area.bounds[1]
-            estimated_text_width = existing_width * 0.8
-            estimated_text_height = existing_height * 0.8
-            
-            existing_text_corners = calculate_label_corners(
-                existing_center.x, existing_center.y, 
-                estimated_text_width, estimated_text_height, 
-                0, 0
-            )
-            existing_text_box = Polygon(existing_text_corners)
-            
-            if alt_text_box.intersects(existing_text_box):
-                text_overlaps = True
-                break
+        total_overlap = 0
+        candidates = nearby[alt_buffer_hits[k]]
+        if candidates.size:
+            alt_corners = center + area_offsets + (dx, dy)
+            overlapping = candidates[rectangles_intersect(alt_corners, used_label_areas.corners[candidates])]
+            if NUMBA_AVAILABLE:
+                total_overlap = overlap_area_sum(alt_corners, used_label_areas.corners[overlapping])
+            else:
+                total_overlap = sum(intersection_area(alt_corners, used_label_areas[i]) for i in overlapping)
         
         # Check if this is a valid position (minimal or no overlap)
         if total_overlap == 0:
             return False, (x + dx, y + dy)
         
+        # Check for severe text overlaps at this position
+        text_overlaps = text_overlaps_at(k, dx, dy)
+        
         # If no text overlaps and buffer overlap is minimal, consider this position
         if not text_overlaps and total_overlap < min_overlap:
             min_overlap = total_overlap
@@ -675,44 +740,39 @@ def check_label_collision(x, y, width, height, angle, used_label_areas, buffer_d
     
     # If all positions have collisions, try once more with a reduced buffer
     if buffer_distance > 5:
-        reduced_buffer = max(buffer_distance / 2, 5)
-        # Just try a few key positions with reduced buffer
-        for dx, dy in cardinal_offsets:
-            alt_corners = calculate_label_corners(x + dx, y + dy, width, height, angle, reduced_buffer)
-            alt_box = Polygon(alt_corners)
-            
-            # Create actual text box for this position
-            alt_text_corners = calculate_label_corners(x + dx, y + dy, width, height, angle, 0)
-            alt_text_box = Polygon(alt_text_corners)
-            
-            # Check for severe text overlaps
-            text_overlaps = False
-            for existing_area in used_label_areas:
-                existing_center = existing_area.centroid
-                existing_width = existing_area.bounds[2] - existing_area.bounds[0]
-                existing_height = existing_area.bounds[3] - existing_area.bounds[1]
-                estimated_text_width = existing_width * 0.8
-                estimated_text_height = existing_height * 0.8
-                
-                existing_text_corners = calculate_label_corners(
-                    existing_center.x, existing_center.y, 
-                    estimated_text_width, estimated_text_height, 
-                    0, 0
-                )
-                existing_text_box = Polygon(existing_text_corners)
-                
-                if alt_text_box.intersects(existing_text_box):
-                    text_overlaps = True
-                    break
-            
+        # Just try a few key positions; only the text overlap decides here
+        for k, (dx, dy) in enumerate(_CARDINAL_OFFSETS):
             # Accept position with reduced buffer if no text overlaps
-            if not text_overlaps:
+            if not text_overlaps_at(k, dx, dy):
                 return False, (x + dx, y + dy)
     
     # Always return a position - we never want to remove labels
     # Return the position with minimal overlap
     return False, best_pos
 
+def _corners_bounds(corners):
+    """Return the (minx, miny, maxx, maxy) bounding box of a list of corner points"""
+    points = np.asarray(corners, dtype=np.float64)
+    return np.concatenate([points.min(axis=0), points.max(axis=0)])
+
+def readable_angle(dx, dy):
+    """
+    Angle of a direction in degrees, flipped by 180 degrees when needed to keep text upright.
+    
+    Args:
+        dx, dy (float): Direction vector in SVG coordinates
+        
+    Returns:
+        float: Angle in the range [-90, 90]
+    """
+    angle = math.degrees(math.atan2(dy, dx))
+    # Reversing the direction is a half turn, no second atan2 needed
+    if angle > 90:
+        return angle - 180
+    if angle < -90:
+        return angle + 180
+    return angle
+
 def snap_label_to_road(x, y, angle, svg_points, offset=0, text_width=0, text_height=0, road_center=None):
     """
     Snap a label position to the nearest point on the road, accounting for angle and readability.
@@ -732,98 +792,73 @@ def snap_label_to_road(x, y, angle, svg_points, offset=0, text_width=0, text_hei
         return x, y
     if road_center is None:
         road_center = (x, y)
-    suitable_segments = []
-    total_road_length = 0
-    for i in range(len(svg_points) - 1):
-        p1, p2 = svg_points[i], svg_points[i + 1]
-        segment_length = ((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)**0.5
-        total_road_length += segment_length
+    # Without Numba the kernel runs as plain Python, which is still the faster choice on short roads
+    if NUMBA_AVAILABLE or len(svg_points) <= SMALL_ROAD_POINTS:
+        segment_idx, proj_x, proj_y = best_snap_segment(np.asarray(svg_points, dtype=np.float64), x, y,
+                                                        road_center[0], road_center[1], float(text_width))
+        if segment_idx < 0:
+            return x, y
+        return _offset_from_road((float(proj_x), float(proj_y)), svg_points, int(segment_idx), offset)
+    pts = np.asarray(svg_points, dtype=np.float64)
+    deltas = pts[1:] - pts[:-1]
+    segment_lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+    total_road_length = float(segment_lengths.sum())
 
     is_short_road = total_road_length < text_width * 1.5
+    min_segment_length = text_width * (0.5 if is_short_road else 0.75)
+    length_norm = text_width * 2.0
 
-    for i in range(len(svg_points) - 1):
-        p1, p2 = svg_points[i], svg_points[i + 1]
-        segment_length = ((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)**0.5
-        min_segment_length = text_width * 0.5 if is_short_road else text_width * 0.75
-        if segment_length < min_segment_length:
-            continue
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
-        segment_angle = math.degrees(math.atan2(dy, dx))
-        if segment_angle < -90 or segment_angle > 90:
-            segment_angle = math.degrees(math.atan2(-dy, -dx))
-        horizontality = abs(segment_angle)
-        projected = project_point_to_line((x, y), p1, p2)
-        p1_to_proj = ((projected[0] - p1[0])**2 + (projected[1] - p1[1])**2)**0.5
-        p2_to_proj = ((projected[0] - p2[0])**2 + (projected[1] - p2[1])**2)**0.5
-        segment_to_segment_ratio = p1_to_proj / (p1_to_proj + p2_to_proj)
-        if is_short_road:
-            mid_x = (p1[0] + p2[0]) / 2
-            mid_y = (p1[1] + p2[1]) / 2
-            projected = (mid_x, mid_y)
-            dist = ((x - mid_x)**2 + (y - mid_y)**2)**0.5
-        else:
-            dist = ((x - projected[0])**2 + (y - projected[1])**2)**0.5
-        # New: compute how close this segment's midpoint is to the road's geometric center
-        seg_mid_x = (p1[0] + p2[0]) / 2
-        seg_mid_y = (p1[1] + p2[1]) / 2
-        center_dist = ((seg_mid_x - road_center[0])**2 + (seg_mid_y - road_center[1])**2)**0.5
-        suitable_segments.append({
-            'segment_idx': i,
-            'projected_point': projected,
-            'distance': dist,
-            'length': segment_length,
-            'angle': segment_angle,
-            'horizontality': horizontality,
-            'segment_ratio': segment_to_segment_ratio,
-            'is_middle': abs(segment_to_segment_ratio - 0.5) < 0.2,
-            'center_dist': center_dist,
-            'seg_mid': (seg_mid_x, seg_mid_y)
-        })
-
-    if not suitable_segments:
+    # Features of every segment long enough for the label, computed as arrays
+    suitable = np.flatnonzero(segment_lengths >= min_segment_length)
+    if not suitable.size:
         return x, y
+    p1 = pts[suitable]
+    p2 = pts[suitable + 1]
+    dx = deltas[suitable, 0]
+    dy = deltas[suitable, 1]
+    angles = np.degrees(np.arctan2(dy, dx))
+    # Fold to [-90, 90] by removing whole half turns; round() is half-to-even, so +/-90 stay put
+    horizontality = np.abs(angles - 180.0 * np.round(angles / 180.0))
+    # Project the label position onto each segment; degenerate segments project onto their start
+    ab2 = dx * dx + dy * dy
+    t = np.divide((x - p1[:, 0]) * dx + (y - p1[:, 1]) * dy, ab2, out=np.zeros_like(ab2), where=ab2 != 0)
+    # The projection parameter is the position along the segment, so no distances are needed
+    segment_ratio = np.clip(t, 0, 1)
+    projected = p1 + segment_ratio[:, None] * deltas[suitable]
+    seg_mid = (p1 + p2) / 2
+    if is_short_road:
+        projected = seg_mid
+    dist = np.hypot(x - projected[:, 0], y - projected[:, 1])
+    # How close each segment's midpoint is to the road's geometric center
+    center_dist = np.hypot(seg_mid[:, 0] - road_center[0], seg_mid[:, 1] - road_center[1])
 
-    # Find min/max for normalization
-    min_center_dist = min(s['center_dist'] for s in suitable_segments)
-    max_center_dist = max(s['center_dist'] for s in suitable_segments)
-    center_dist_range = max(max_center_dist - min_center_dist, 1e-6)
-
-    for segment in suitable_segments:
-        distance_score = 1 - min(segment['distance'] / 100, 1)
-        length_score = min(segment['length'] / (text_width * 2), 1)
-        horizontality_score = 1 - (segment['horizontality'] / 90)
-        middle_score = 1.0 - abs(segment['segment_ratio'] - 0.5) * 2
-        # New: score for proximity to road center (1 = closest)
-        center_proximity_score = 1 - (segment['center_dist'] - min_center_dist) / center_dist_range
-        # Strongly weight center proximity for all roads
-        if is_short_road:
-            segment['score'] = (
-                distance_score * 0.1 +
-                length_score * 0.1 +
-                horizontality_score * 0.1 +
-                middle_score * 0.2 +
-                center_proximity_score * 0.5
-            )
-        else:
-            segment['score'] = (
-                distance_score * 0.15 +
-                length_score * 0.15 +
-                horizontality_score * 0.1 +
-                middle_score * 0.2 +
-                center_proximity_score * 0.4
-            )
+    # Normalize the center distances over the suitable segments
+    min_center_dist = center_dist.min()
+    center_dist_range = max(center_dist.max() - min_center_dist, 1e-6)
+
+    distance_score = 1 - np.minimum(dist / 100, 1)
+    length_score = np.minimum(segment_lengths[suitable] / length_norm, 1.0)
+    horizontality_score = 1 - (horizontality / 90)
+    middle_score = 1.0 - np.abs(segment_ratio - 0.5) * 2
+    # Score for proximity to road center (1 = closest)
+    center_proximity_score = 1 - (center_dist - min_center_dist) / center_dist_range
+    # Weighted sum in the kernel's term order, so both paths pick the same segment
+    weights = SNAP_SCORE_WEIGHTS[1 if is_short_road else 0].tolist()
+    scores = (distance_score * weights[0] + length_score * weights[1] + horizontality_score * weights[2] +
+              middle_score * weights[3] + center_proximity_score * weights[4])
+
+    # First best segment wins ties, as with a stable sort by descending score
+    best = int(np.argmax(scores))
+    projected_point = (float(projected[best, 0]), float(projected[best, 1]))
+    return _offset_from_road(projected_point, svg_points, int(suitable[best]), offset)
 
-    suitable_segments.sort(key=lambda s: s['score'], reverse=True)
-    best_segment = suitable_segments[0]
-    segment_idx = best_segment['segment_idx']
-    projected_point = best_segment['projected_point']
-    # Use the angle of the best segment (not returned, but could be used if needed)
+def _offset_from_road(projected_point, svg_points, segment_idx, offset):
+    """Move a point on a road segment perpendicular to the segment by offset"""
     if offset != 0 and segment_idx < len(svg_points) - 1:
         p1, p2 = svg_points[segment_idx], svg_points[segment_idx + 1]
         dx = p2[0] - p1[0]
         dy = p2[1] - p1[1]
-        length = ((dx)**2 + (dy)**2)**0.5
+        length = math.hypot(dx, dy)
         if length > 0:
             perpendicular_x = -dy / length
             perpendicular_y = dx / length
@@ -8,187 +8,290 @@ This module handles the styling of SVG elements based on OSM tags and KML styles
 """
 
 import logging
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
 from coord_transform import kml_color_to_svg
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def get_way_style(tags, is_inside=True):
+# The OSM tags that drive way styling and labelling; absent tags are None
+WayTags = namedtuple('WayTags', 'highway building natural waterway landuse leisure amenity name')
+WAY_TAG_KEYS = frozenset(WayTags._fields)
+
+def way_tags(tags):
     """
-    Determine rendering style based on OSM tags and position.
+    Extract the styling tags of a way.
     
     Args:
         tags (dict): OSM tags
-        is_inside (bool, optional): Whether the feature is inside the boundary. Defaults to True.
         
     Returns:
-        dict: Style dictionary with rendering properties or None if no style is applicable
+        WayTags: Values of the styling tags, None for absent ones
     """
+    return WayTags(*map(tags.get, WayTags._fields))
+
+# Way styles, shared by every way they apply to; get_way_style copies them
+BUILDING_STYLE = MappingProxyType({
+    "fill": "#E4E0D8",  # Light beige for buildings
+    "stroke": "#D4D0C8",
+    "stroke-width": 1,
+    "opacity": 0.9,
+    "type": "polygon"
+})
+PARKING_STYLE = MappingProxyType({
+    "fill": "#F0F0F0",  # Very light gray for parking
+    "stroke": "#D0D0D0",
+    "stroke-width": 1,
+    "opacity": 0.8,
+    "type": "polygon",
+    "symbol": "P"
+})
+FOOTPATH_STYLE = MappingProxyType({
+    "type": "road",
+    "casing": True,
+    "stroke": "#FFFFFF",  # White for pedestrian paths
+    "stroke-width": 2,
+    "casing-color": "#E0E0E0",
+    "casing-width": 3,
+    "opacity": 0.8,
+    "is_path": True
+})
+MAJOR_ROAD_STYLE = MappingProxyType({
+    "type": "road",
+    "casing": True,
+    "stroke": "#FFA07A",
+    "stroke-width": 6,
+    "casing-color": "#FF8C69",
+    "casing-width": 8,
+    "opacity": 1
+})
+PRIMARY_ROAD_STYLE = MappingProxyType({
+    "type": "road",
+    "casing": True,
+    "stroke": "#FCD68A",
+    "stroke-width": 5,
+    "casing-color": "#F4BC6C",
+    "casing-width": 7,
+    "opacity": 1
+})
+SECONDARY_ROAD_STYLE = MappingProxyType({
+    "type": "road",
+    "casing": True,
+    "stroke": "#FAFAFA",
+    "stroke-width": 4,
+    "casing-color": "#E0E0E0",
+    "casing-width": 6,
+    "opacity": 1
+})
+MINOR_ROAD_STYLE = MappingProxyType({
+    "type": "road",
+    "casing": True,
+    "stroke": "#FFFFFF",
+    "stroke-width": 2.5,
+    "casing-color": "#E0E0E0",
+    "casing-width": 3.5,
+    "opacity": 0.8
+})
+WATER_STYLE = MappingProxyType({
+    "fill": "#B3D1FF",
+    "stroke": "#A1C3FF",
+    "stroke-width": 1,
+    "opacity": 0.6,
+    "type": "polygon"
+})
+ALLOTMENT_STYLE = MappingProxyType({
+    "fill": "#E8F4D9",    # Pale green for allotments
+    "stroke": "none",      # No border
+    "stroke-width": 0,    # Zero border width
+    "opacity": 0.9,       # Increased opacity
+    "type": "polygon"
+})
+GREEN_SPACE_STYLE = MappingProxyType({
+    "fill": "#90EE90",  # Light green for green spaces
+    "stroke": "#7BE37B",
+    "stroke-width": 1,
+    "opacity": 0.7,
+    "type": "polygon"
+})
+FOREST_STYLE = MappingProxyType({
+    "fill": "#C6DFB3",  # Dark green for forests
+    "stroke": "#B5CE9F",
+    "stroke-width": 1,
+    "opacity": 0.6,
+    "type": "polygon"
+})
+
+# Overrides for ways outside the boundary; footpaths are kept visible
+OUTSIDE_ROAD_STYLE = MappingProxyType({"stroke": "#CCCCCC", "casing-color": "#BBBBBB", "opacity": 0.5})
+OUTSIDE_AREA_STYLE = MappingProxyType({"fill": "#EEEEEE", "stroke": "#DDDDDD", "opacity": 0.3})
+
+# Road style by highway type; other highway types are drawn as minor roads
+HIGHWAY_STYLES = {
+    "footway": FOOTPATH_STYLE,
+    "path": FOOTPATH_STYLE,
+    "pedestrian": FOOTPATH_STYLE,
+    "motorway": MAJOR_ROAD_STYLE,
+    "trunk": MAJOR_ROAD_STYLE,
+    "primary": PRIMARY_ROAD_STYLE,
+    "secondary": SECONDARY_ROAD_STYLE
+}
+
+# Tag values of the green-space styles
+ALLOTMENT_LANDUSE = frozenset({"allotment", "allotments"})  # Handle both singular and plural
+GREEN_SPACE_LEISURE = frozenset({"park", "garden"})
+FOREST_LANDUSE = frozenset({"forest", "recreation_ground"})
+
+def _building_style(tags):
+    return BUILDING_STYLE
+
+def _parking_style(tags):
+    return PARKING_STYLE if tags.amenity == "parking" else None
+
+def _road_style(tags):
+    return HIGHWAY_STYLES.get(tags.highway, MINOR_ROAD_STYLE)
+
+def _water_style(tags):
+    if tags.waterway is not None or tags.natural == "water":
+        return WATER_STYLE
+    return None
+
+def _green_space_style(tags):
+    if tags.landuse in ALLOTMENT_LANDUSE:
+        return ALLOTMENT_STYLE
+    if tags.leisure in GREEN_SPACE_LEISURE or tags.landuse == "grass":
+        return GREEN_SPACE_STYLE
+    if tags.natural == "wood" or tags.landuse in FOREST_LANDUSE:
+        return FOREST_STYLE
+    return None
+
+# Tag to probe and style function, in priority order: the first style found wins
+_STYLE_DISPATCH = (
+    ("building", _building_style),
+    ("amenity", _parking_style),
+    ("highway", _road_style),
+    ("waterway", _water_style),
+    ("natural", _water_style),
+    ("leisure", _green_space_style),
+    ("landuse", _green_space_style),
+    ("natural", _green_space_style)
+)
+
+@lru_cache(maxsize=4096)
+def _way_style(tags, is_inside):
+    """Style of a way from its styling tags (name left out); read-only, cached"""
     base_style = None
-    
-    if "building" in tags:
-        base_style = {
-            "fill": "#E4E0D8",  # Light beige for buildings
-            "stroke": "#D4D0C8",
-            "stroke-width": 1,
-            "opacity": 0.9,
-            "type": "polygon"
-        }
-    
-    elif "amenity" in tags and tags["amenity"] == "parking":
-        base_style = {
-            "fill": "#F0F0F0",  # Very light gray for parking
-            "stroke": "#D0D0D0",
-            "stroke-width": 1,
-            "opacity": 0.8,
-            "type": "polygon",
-            "symbol": "P"
-        }
-    
-    elif "highway" in tags:
-        highway_type = tags["highway"]
-        style = {
-            "type": "road",
-            "casing": True
-        }
-        
-        if highway_type in ["footway", "path", "pedestrian"]:
-            style.update({
-                "stroke": "#FFFFFF",  # White for pedestrian paths
-                "stroke-width": 2,
-                "casing-color": "#E0E0E0",
-                "casing-width": 3,
-                "opacity": 0.8,
-                "is_path": True
-            })
-        elif highway_type in ["motorway", "trunk"]:
-            style.update({
-                "stroke": "#FFA07A",
-                "stroke-width": 6,
-                "casing-color": "#FF8C69",
-                "casing-width": 8,
-                "opacity": 1
-            })
-        elif highway_type in ["primary"]:
-            style.update({
-                "stroke": "#FCD68A",
-                "stroke-width": 5,
-                "casing-color": "#F4BC6C",
-                "casing-width": 7,
-                "opacity": 1
-            })
-        elif highway_type in ["secondary"]:
-            style.update({
-                "stroke": "#FAFAFA",
-                "stroke-width": 4,
-                "casing-color": "#E0E0E0",
-                "casing-width": 6,
-                "opacity": 1
-            })
-        else:
-            style.update({
-                "stroke": "#FFFFFF",
-                "stroke-width": 2.5,
-                "casing-color": "#E0E0E0",
-                "casing-width": 3.5,
-                "opacity": 0.8
-            })
-        base_style = style
-    
-    elif "waterway" in tags or tags.get("natural") == "water":
-        base_style = {
-            "fill": "#B3D1FF",
-            "stroke": "#A1C3FF",
-            "stroke-width": 1,
-            "opacity": 0.6,
-            "type": "polygon"
-        }
-    
-    elif any(tag in tags for tag in ["leisure", "landuse", "natural"]):
-        if tags.get("landuse") in ["allotment", "allotments"]:  # Handle both singular and plural
-            base_style = {
-                "fill": "#E8F4D9",    # Pale green for allotments
-                "stroke": "none",      # No border
-                "stroke-width": 0,    # Zero border width
-                "opacity": 0.9,       # Increased opacity
-                "type": "polygon"
-            }
-        elif tags.get("leisure") in ["park", "garden"] or tags.get("landuse") == "grass":
-            base_style = {
-                "fill": "#90EE90",  # Light green for green spaces
-                "stroke": "#7BE37B",
-                "stroke-width": 1,
-                "opacity": 0.7,
-                "type": "polygon"
-            }
-        elif tags.get("natural") == "wood" or tags.get("landuse") in ["forest", "recreation_ground"]:
-            base_style = {
-                "fill": "#C6DFB3",  # Dark green for forests
-                "stroke": "#B5CE9F",
-                "stroke-width": 1,
-                "opacity": 0.6,
-                "type": "polygon"
-            }
+    for tag, style_for in _STYLE_DISPATCH:
+        if getattr(tags, tag) is not None:
+            base_style = style_for(tags)
+            if base_style is not None:
+                break
     
     if base_style and not is_inside:
+        base_style = dict(base_style)
         if base_style.get("type") == "road":
             if "is_path" not in base_style:  # Keep footpaths visible
-                base_style["stroke"] = "#CCCCCC"
-                base_style["casing-color"] = "#BBBBBB"
-                base_style["opacity"] = 0.5
+                base_style.update(OUTSIDE_ROAD_STYLE)
         else:
-            base_style["fill"] = "#EEEEEE"
-            base_style["stroke"] = "#DDDDDD"
-            base_style["opacity"] = 0.3
+            base_style.update(OUTSIDE_AREA_STYLE)
+        base_style = MappingProxyType(base_style)
     
     return base_style
 
-def get_kml_style(feature, kml_styles):
+def shared_way_style(tags, is_inside=True):
     """
-    Determine rendering style based on KML style information.
+    Determine rendering style based on OSM tags and position, without copying it.
+    
+    Many ways share the same styling tags, so styles are cached by those tags
+    and the same read-only mapping is returned for every such way. Use
+    get_way_style for a style that can be modified.
+    
+    Args:
+        tags (WayTags or dict): OSM tags
+        is_inside (bool, optional): Whether the feature is inside the boundary. Defaults to True.
+        
+    Returns:
+        MappingProxyType: Shared read-only style, or None if no style is applicable
+    """
+    if not isinstance(tags, WayTags):
+        tags = way_tags(tags)
+    return _way_style(tags._replace(name=None), bool(is_inside))
+
+def get_way_style(tags, is_inside=True):
+    """
+    Determine rendering style based on OSM tags and position.
+    
+    Args:
+        tags (WayTags or dict): OSM tags
+        is_inside (bool, optional): Whether the feature is inside the boundary. Defaults to True.
+        
+    Returns:
+        dict: New style dictionary with rendering properties or None if no style is applicable
+    """
+    style = shared_way_style(tags, is_inside)
+    return dict(style) if style is not None else None
+
+# Default styles of KML features by geometry type; get_kml_style copies them
+KML_DEFAULT_STYLES = MappingProxyType({
+    "Polygon": MappingProxyType({
+        "fill": "#3388FF",
+        "stroke": "#0066CC",
+        "stroke-width": 1,
+        "opacity": 0.7,
+        "type": "polygon"
+    }),
+    "LineString": MappingProxyType({
+        "stroke": "#3388FF",
+        "stroke-width": 2,
+        "opacity": 0.9,
+        "type": "line"
+    }),
+    "Point": MappingProxyType({
+        "fill": "#3388FF",
+        "radius": 5,
+        "opacity": 0.9,
+        "type": "point"
+    }),
+    "MultiGeometry": MappingProxyType({
+        "fill": "#3388FF",
+        "stroke": "#0066CC",
+        "stroke-width": 1,
+        "opacity": 0.7,
+        "type": "multi"
+    })
+})
+
+# Opacity factor, and opacity cap, of KML features outside the boundary by style type
+KML_OUTSIDE_OPACITY = MappingProxyType({"polygon": 0.5, "multi": 0.5, "line": 0.7})
+
+def get_kml_style(feature, kml_styles, is_inside=True):
+    """
+    Determine rendering style based on KML style information and position.
     
     Args:
         feature (dict): KML feature data
         kml_styles (dict): Dictionary of KML style definitions
+        is_inside (bool, optional): Whether the feature is inside the boundary. Defaults to True.
         
     Returns:
         dict: Style dictionary with rendering properties
     """
-    # Default styles
-    default_style = {
-        "Polygon": {
-            "fill": "#3388FF",
-            "stroke": "#0066CC",
-            "stroke-width": 1,
-            "opacity": 0.7,
-            "type": "polygon"
-        },
-        "LineString": {
-            "stroke": "#3388FF",
-            "stroke-width": 2,
-            "opacity": 0.9,
-            "type": "line"
-        },
-        "Point": {
-            "fill": "#3388FF",
-            "radius": 5,
-            "opacity": 0.9,
-            "type": "point"
-        },
-        "MultiGeometry": {
-            "fill": "#3388FF",
-            "stroke": "#0066CC",
-            "stroke-width": 1,
-            "opacity": 0.7,
-            "type": "multi"
-        }
-    }
-    
+    style = _resolve_kml_style(feature, kml_styles)
+    if not is_inside:
+        # Fade features outside the boundary
+        factor = KML_OUTSIDE_OPACITY.get(style.get('type'))
+        if factor is not None:
+            style['opacity'] = min(style.get('opacity', 1.0) * factor, factor)
+    return style
+
+def _resolve_kml_style(feature, kml_styles):
+    """Style of a KML feature from the defaults and its referenced KML style"""
     feature_type = feature.get('type')
     style_url = feature.get('style_url')
     
     # Get default style for this feature type
-    style = default_style.get(feature_type, default_style['Polygon']).copy()
+    style = KML_DEFAULT_STYLES.get(feature_type, KML_DEFAULT_STYLES['Polygon']).copy()
     
     # If no style URL or no matching style, return default
     if not style_url or not kml_styles:
@@ -267,22 +370,13 @@ def get_feature_style(feature, kml_styles=None, is_inside=True):
     Returns:
         dict: Style dictionary with rendering properties
     """
-    # Determine if this is a KML or OSM feature
+    # Determine if this is a KML or OSM feature; each applies its own outside-boundary styling
     if 'type' in feature and feature['type'] in ('Polygon', 'LineString', 'Point', 'MultiGeometry'):
         # KML feature
-        style = get_kml_style(feature, kml_styles or {})
+        return get_kml_style(feature, kml_styles or {}, is_inside)
     elif 'tags' in feature:
         # OSM feature
-        style = get_way_style(feature['tags'], is_inside)
-    else:
-        # Unknown feature type
-        return None
-    
-    # Modify style if feature is outside boundary
-    if not is_inside and style:
-        if style.get('type') in ('polygon', 'multi'):
-            style['opacity'] = min(style.get('opacity', 1.0) * 0.5, 0.5)
-        elif style.get('type') in ('line', 'road'):
-            style['opacity'] = min(style.get('opacity', 1.0) * 0.7, 0.7)
+        return get_way_style(feature['tags'], is_inside)
     
-    return style
+    # Unknown feature type
+    return None
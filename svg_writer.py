@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SVG Writer Module
+
+This module writes SVG documents directly as text. Elements are serialized as
+soon as they are created; groups only buffer their serialized content so layers
+can be filled in any order and written out in drawing order.
+"""
+
+_ATTRIBUTE_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Output buffer size; the document is streamed as many small element strings
+WRITE_BUFFER_SIZE = 1 << 20
+
+def _attribute_name(name):
+    """Map a keyword argument to an SVG attribute name (stroke_width -> stroke-width)"""
+    if name == 'href':
+        return 'xlink:href'
+    return name.rstrip('_').replace('_', '-')
+
+def _attributes(attrs):
+    """Serialize attributes; None values are left out"""
+    return ''.join(f' {_attribute_name(name)}="{str(value).translate(_ATTRIBUTE_ESCAPES)}"'
+                   for name, value in attrs.items() if value is not None)
+
+class SvgTemplate:
+    """
+    Element whose fixed attributes are serialized once.
+
+    Only the leading attributes named in fields vary between instances, so
+    elements sharing a style are written without re-serializing that style.
+    """
+
+    def __init__(self, tag, fields, content=None, **attrs):
+        self._names = [_attribute_name(field) for field in fields]
+        if content is None:
+            self._tail = f'{_attributes(attrs)} />'
+        else:
+            self._tail = f'{_attributes(attrs)}>{str(content).translate(_TEXT_ESCAPES)}</{tag}>'
+        self._head = f'<{tag}'
+
+    def render(self, *values):
+        """
+        Serialize one instance.
+
+        Args:
+            *values: Values of the template fields, in order
+
+        Returns:
+            str: The serialized element
+        """
+        return ''.join([self._head] + [f' {name}="{str(value).translate(_ATTRIBUTE_ESCAPES)}"'
+                                       for name, value in zip(self._names, values)] + [self._tail])
+
+class SvgGroup:
+    """
+    Container element (<g>, <defs>, <pattern>, ...) holding serialized children.
+
+    Keyword attribute names use underscores for hyphens, as in stroke_width.
+    """
+
+    def __init__(self, tag='g', **attrs):
+        self.tag = tag
+        self.attrs = attrs
+        self._parts = []
+
+    def __len__(self):
+        return len(self._parts)
+
+    def element(self, tag, content=None, **attrs):
+        """
+        Append an element.
+
+        Args:
+            tag (str): Element name
+            content (str, optional): Text content, escaped on output
+            **attrs: Element attributes
+
+        Returns:
+            str: The serialized element
+        """
+        if content is None:
+            part = f'<{tag}{_attributes(attrs)} />'
+        else:
+            part = f'<{tag}{_attributes(attrs)}>{str(content).translate(_TEXT_ESCAPES)}</{tag}>'
+        self._parts.append(part)
+        return part
+
+    def instance(self, template, *values):
+        """
+        Append an instance of an SvgTemplate.
+
+        Args:
+            template (SvgTemplate): Template to instantiate
+            *values: Values of the template fields, in order
+
+        Returns:
+            str: The serialized element
+        """
+        part = template.render(*values)
+        self._parts.append(part)
+        return part
+
+    def styled(self, **attrs):
+        """
+        Get a child <g> carrying shared presentation attributes.
+
+        Consecutive elements with the same style share one group, so their
+        attributes are written once; anything appended in between starts a new
+        group, which keeps the painting order.
+
+        Args:
+            **attrs: Attributes of the group
+
+        Returns:
+            SvgGroup: The last child if it is a <g> with these attributes, else a new one
+        """
+        last = self._parts[-1] if self._parts else None
+        if isinstance(last, SvgGroup) and last.tag == 'g' and last.attrs == attrs:
+            return last
+        return self.add(SvgGroup(**attrs))
+
+    def add(self, group):
+        """
+        Append a nested group; it is serialized when the document is written.
+
+        Args:
+            group (SvgGroup): Group to nest
+
+        Returns:
+            SvgGroup: The nested group
+        """
+        self._parts.append(group)
+        return group
+
+    def path(self, d, **attrs):
+        """Append a <path> with path data d"""
+        return self.element('path', d=d, **attrs)
+
+    def text(self, content, x, y, **attrs):
+        """Append a <text> element anchored at (x, y)"""
+        return self.element('text', content, x=x, y=y, **attrs)
+
+    def rect(self, x, y, width, height, **attrs):
+        """Append a <rect>"""
+        return self.element('rect', x=x, y=y, width=width, height=height, **attrs)
+
+    def circle(self, cx, cy, r, **attrs):
+        """Append a <circle>"""
+        return self.element('circle', cx=cx, cy=cy, r=r, **attrs)
+
+    def line(self, x1, y1, x2, y2, **attrs):
+        """Append a <line>"""
+        return self.element('line', x1=x1, y1=y1, x2=x2, y2=y2, **attrs)
+
+    def write(self, out):
+        """
+        Write the group and its children.
+
+        Args:
+            out: Text stream to write to
+        """
+        if not self._parts:
+            out.write(f'<{self.tag}{_attributes(self.attrs)} />')
+            return
+        out.write(f'<{self.tag}{_attributes(self.attrs)}>')
+        for part in self._parts:
+            if isinstance(part, SvgGroup):
+                part.write(out)
+            else:
+                out.write(part)
+        out.write(f'</{self.tag}>')
+
+class SvgWriter(SvgGroup):
+    """
+    SVG document written straight to a file.
+
+    Elements added to the document itself and to its groups are kept as text;
+    save() streams the <defs> followed by the document content.
+    """
+
+    def __init__(self, filename, width, height):
+        super().__init__('svg', **{'baseProfile': 'full', 'height': height, 'version': '1.1',
+                                   'width': width, 'xmlns': 'http://www.w3.org/2000/svg',
+                                   'xmlns:ev': 'http://www.w3.org/2001/xml-events',
+                                   'xmlns:xlink': 'http://www.w3.org/1999/xlink'})
+        self.filename = filename
+        self.defs = self.add(SvgGroup('defs'))
+
+    def write(self, out):
+        out.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        super().write(out)
+
+    def save(self):
+        """Write the document to its file, without building the whole text in memory"""
+        with open(self.filename, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as out:
+            self.write(out)
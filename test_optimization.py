@@ -90,23 +90,20 @@ def test_optimization(kml_file, output_dir="output"):
     logger.info(f"\nUnoptimized SVG saved to: {unoptimized_output}")
     logger.info(f"Optimized SVG saved to: {optimized_output}")
 
+# Vertex count of a feature by geometry type; other types have no vertices
+_VERTEX_COUNTERS = {
+    'Polygon': lambda feature: len(feature.get('coordinates', ())),
+    'LineString': lambda feature: len(feature.get('coordinates', ())),
+    'Point': lambda feature: 1,
+    'MultiGeometry': lambda feature: sum(map(len, feature.get('coordinates', ()))),
+}
+
+def _no_vertices(feature):
+    return 0
+
 def count_vertices(features):
     """Count the total number of vertices in all features."""
-    total = 0
-    for feature in features:
-        feature_type = feature.get('type')
-        
-        if feature_type == 'Polygon':
-            total += len(feature.get('coordinates', []))
-        elif feature_type == 'LineString':
-            total += len(feature.get('coordinates', []))
-        elif feature_type == 'Point':
-            total += 1
-        elif feature_type == 'MultiGeometry':
-            for coords in feature.get('coordinates', []):
-                total += len(coords)
-    
-    return total
+    return sum(_VERTEX_COUNTERS.get(feature.get('type'), _no_vertices)(feature) for feature in features)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test geometry optimization in KML to SVG converter")
@@ -20,7 +20,7 @@ import traceback
 from pathlib import Path
 
 from kml_parser import parse_kml, extract_kml_styles
-from osm_data import download_osm_data, load_osm_cache, save_osm_cache, get_cache_key
+from osm_data import download_osm_data
 from svg_generator import create_svg_map
 from geo_utils import get_bounding_box
 
@@ -57,24 +57,8 @@ def run_test(kml_file, output_dir):
       # Get OSM data
     logger.info("Downloading or retrieving cached OSM data...")
     
-    # Load cache and check if we already have data for this bounding box
-    osm_data = None
-    cache_key = get_cache_key(bbox)
-    
-    try:
-        cache = load_osm_cache()
-        if cache_key in cache:
-            logger.info("Using cached OSM data...")
-            osm_data = cache[cache_key]
-        else:
-            logger.info("Downloading OSM data...")
-            osm_data = download_osm_data(bbox)
-            cache[cache_key] = osm_data
-            save_osm_cache(cache)
-    except Exception as e:
-        logger.error(f"Error loading or saving OSM data: {e}")
-        logger.error("Downloading OSM data without caching...")
-        osm_data = download_osm_data(bbox)
+    # download_osm_data returns the cached data when this area was downloaded before
+    osm_data = download_osm_data(bbox)
     
     # Test 1: Basic Road Labels
     logger.info("Test 1: Basic road labels")